@@ -0,0 +1,391 @@
+# api.py
+"""
+Headless interview API: the same pipeline as app.py (setup -> ask -> transcribe -> follow-ups
+-> grading -> report) as an async HTTP service, for custom front ends and for scaling the
+interview flow separately from the Streamlit UI.
+
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+Blocking work (Gemini, Whisper, TTS, PDF) runs in worker threads so the event loop stays free;
+grading runs on each session's EvaluationQueue and can be followed with GET /sessions/{id}/events
+(server-sent events). Sessions are kept in memory and mirrored to the session store
+(SESSION_STORE_URL), so any API process sharing that store can pick a session up.
+"""
+import os
+os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
+
+import asyncio
+import json
+import re
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, File, Header, HTTPException, UploadFile
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+
+from helpers import ai_helpers, google_tts, metrics
+from helpers.audio_store import get_store
+from helpers.eval_queue import EvaluationQueue
+from helpers.report_builder import ReportBuilder
+from helpers.session_store import SessionPersister, open_backend, SESSION_TTL
+from helpers.transcribe_scheduler import TranscriptionScheduler
+
+load_dotenv()
+
+IDLE_SECONDS = float(os.getenv("API_SESSION_IDLE_SECONDS", "3600"))  # in-memory sessions dropped after this
+EVENT_INTERVAL = 0.5
+
+
+class SetupRequest(BaseModel):
+    job_title: str = "Pre-built Interview"
+    job_description: str = ""
+    difficulty: str = "Medium"
+    num_questions: int = Field(5, ge=1, le=20)
+    resume_text: str | None = None
+    # Pre-built interviews pass their questions directly and skip generation
+    questions: list[dict] | None = None
+
+
+class InterviewSession:
+    """One interview. `state` uses the same field names as app.py's session_state so the
+    session store and report builder work on it unchanged."""
+
+    def __init__(self, session_id, gemini_key, state=None):
+        self.session_id = session_id
+        self.gemini_key = gemini_key
+        self.state = state if state is not None else {}
+        self.lock = asyncio.Lock()  # one answer at a time
+        # Short sections that read or change `state`; persisting runs on a thread while holding it
+        self.state_lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        self.eval_queue = EvaluationQueue(gemini_key, max_workers=int(os.getenv("EVAL_CONCURRENCY", "2")),
+                                          session_id=session_id)
+        self.report = ReportBuilder(session_id=session_id)
+        backend = get_backend()
+        self.persister = SessionPersister(backend, session_id) if backend is not None else None
+
+    def persist(self):
+        if self.persister is not None:
+            self.persister.sync(self.state)
+
+    def collect_feedback(self):
+        """Moves finished grading results into the answers without waiting. Returns how many arrived."""
+        arrived = 0
+        for i, parsed in self.eval_queue.results(timeout=0):
+            answer = self.state["answers"][i]
+            if "feedback_parsed" not in answer:
+                answer["feedback_parsed"] = parsed
+                arrived += 1
+        if arrived:
+            self.report.update(self.state)
+            self.persist()
+        return arrived
+
+    # SQLite writes, zlib and report snapshots stay off the event loop
+    async def save(self):
+        async with self.state_lock:
+            await asyncio.to_thread(self.persist)
+
+    async def refresh(self):
+        async with self.state_lock:
+            return await asyncio.to_thread(self.collect_feedback)
+
+    def submit_ungraded(self, batch=False):
+        ungraded = [(i, a["question"]["question"], a["transcription"], a["filler_count"], a.get("speech_stats"))
+                    for i, a in enumerate(self.state.get("answers", []))
+                    if "feedback_parsed" not in a and not self.eval_queue.has(i)]
+        if batch:
+            self.eval_queue.submit_batch(ungraded, batch_size=int(os.getenv("EVAL_BATCH_SIZE", "5")))
+        else:
+            for item in ungraded:
+                self.eval_queue.submit(*item)
+        return len(ungraded)
+
+    def status(self):
+        answers = self.state.get("answers", [])
+        return {
+            "session_id": self.session_id,
+            "stage": self.state.get("stage"),
+            "question": self.state.get("current_question_to_ask") if self.state.get("stage") == "interview" else None,
+            "answered": len(answers),
+            "graded": sum(1 for a in answers if "feedback_parsed" in a),
+            "grading_in_flight": self.eval_queue.in_flight(),
+        }
+
+    def close(self):
+        self.eval_queue.shutdown()
+        self.report.shutdown()
+        metrics.drop_session_trace(self.session_id)
+
+
+_backend = None
+_backend_loaded = False
+_transcriber = None
+_sessions = {}
+
+
+def get_backend():
+    global _backend, _backend_loaded
+    if not _backend_loaded:
+        _backend_loaded = True
+        try:
+            _backend = open_backend()
+            if _backend is not None:
+                _backend.purge(SESSION_TTL)
+        except Exception as e:
+            print(f"Session persistence disabled: {e}")
+            _backend = None
+    return _backend
+
+
+def get_transcriber():
+    """One batched Whisper scheduler for every session in the process."""
+    global _transcriber
+    if _transcriber is None:
+        _transcriber = TranscriptionScheduler(hf_token=os.getenv("HF_TOKEN"))
+    return _transcriber
+
+
+def _gemini_key(header_value):
+    key = header_value or os.getenv("GEMINI_API_KEY")
+    if not key:
+        raise HTTPException(400, "Gemini API key missing (X-Gemini-Key header or GEMINI_API_KEY).")
+    return key
+
+
+def _reap_idle():
+    cutoff = time.monotonic() - IDLE_SECONDS
+    for sid in [sid for sid, s in _sessions.items() if s.last_used < cutoff and not s.lock.locked()]:
+        _sessions.pop(sid).close()
+
+
+def _resume_session(session_id, gemini_key):
+    """Loads a session another process persisted, or returns None."""
+    session = InterviewSession(session_id, gemini_key)
+    if not session.persister.restore(session.state):  # also primes the digests for the next sync
+        session.close()
+        return None
+    if session.state.get("stage") == "processing":
+        # Grading that was in flight in the other process is gone with it
+        session.submit_ungraded()
+    return session
+
+
+async def _get_session(session_id, gemini_key=None):
+    session = _sessions.get(session_id)
+    if session is None:
+        # Not in this process: resume from the shared session store if it's there
+        if not re.fullmatch(r"[0-9a-f]{32}", session_id) or get_backend() is None:
+            raise HTTPException(404, "Unknown session.")
+        resumed = await asyncio.to_thread(_resume_session, session_id, _gemini_key(gemini_key))
+        if resumed is None:
+            raise HTTPException(404, "Unknown session.")
+        session = _sessions.setdefault(session_id, resumed)
+        if session is not resumed:  # another request resumed it meanwhile
+            resumed.close()
+    session.last_used = time.monotonic()
+    return session
+
+
+def _next_question(state, followups):
+    """Same progression as app.py: queued follow-ups first, then the next main question."""
+    current_type = state["current_question_to_ask"].get("type")
+    if state["pending_followups"]:
+        state["current_question_to_ask"] = {"question": state["pending_followups"].pop(0), "type": "follow-up"}
+        return
+    if current_type != "follow-up" and followups:
+        state["pending_followups"] = list(followups)
+        state["current_question_to_ask"] = {"question": state["pending_followups"].pop(0), "type": "follow-up"}
+        return
+    state["current_question_index"] += 1
+    if state["current_question_index"] >= len(state["initial_questions"]):
+        state["stage"] = "processing"
+    else:
+        state["current_question_to_ask"] = state["initial_questions"][state["current_question_index"]]
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    if os.getenv("WHISPER_WARMUP", "1") != "0":
+        get_transcriber().warm_up()
+    yield
+    for session in _sessions.values():
+        session.close()
+    _sessions.clear()
+    if _transcriber is not None:
+        _transcriber.shutdown()
+
+
+app = FastAPI(title="CrackGPT Interview API", lifespan=lifespan)
+
+
+@app.post("/sessions")
+async def create_session(req: SetupRequest, x_gemini_key: str | None = Header(None)):
+    _reap_idle()
+    gemini_key = _gemini_key(x_gemini_key)
+    session_id = uuid.uuid4().hex
+    metrics.set_session(session_id)
+    if req.questions:
+        questions = req.questions
+    else:
+        _, questions = await asyncio.to_thread(
+            ai_helpers.extract_skills_and_questions, gemini_key=gemini_key, job_title=req.job_title,
+            job_description=req.job_description, num_questions=req.num_questions,
+            difficulty=req.difficulty, resume_text=req.resume_text)
+    if not questions:
+        raise HTTPException(502, "No questions were generated.")
+    session = InterviewSession(session_id, gemini_key, {
+        "stage": "interview",
+        "job_details": {"title": req.job_title, "difficulty": req.difficulty},
+        "resume_text": req.resume_text,
+        "initial_questions": questions,
+        "answers": [],
+        "current_question_index": 0,
+        "current_question_to_ask": questions[0],
+        "pending_followups": [],
+    })
+    _sessions[session_id] = session
+    await session.save()
+    return session.status()
+
+
+@app.get("/sessions/{session_id}")
+async def get_status(session_id: str, x_gemini_key: str | None = Header(None)):
+    session = await _get_session(session_id, x_gemini_key)
+    await session.refresh()
+    return session.status()
+
+
+@app.get("/sessions/{session_id}/question/audio")
+async def question_audio(session_id: str, x_gemini_key: str | None = Header(None)):
+    """The current question as speech (MP3), through the shared TTS cache."""
+    session = await _get_session(session_id, x_gemini_key)
+    if session.state.get("stage") != "interview":
+        raise HTTPException(409, "The interview is over.")
+    text = session.state["current_question_to_ask"]["question"]
+    try:
+        audio = await asyncio.to_thread(google_tts.tts_audio_bytes, text)
+    except Exception as e:
+        raise HTTPException(502, f"Speech synthesis failed: {e}")
+    return Response(audio, media_type="audio/mpeg")
+
+
+@app.post("/sessions/{session_id}/answers")
+async def submit_answer(session_id: str, audio: UploadFile = File(...), x_gemini_key: str | None = Header(None),
+                        batch_evaluation: bool = False):
+    """
+    Transcribes the recorded answer to the current question, queues its grading (unless
+    batch_evaluation, which grades everything at /evaluate) and moves to the next question.
+    """
+    session = await _get_session(session_id, x_gemini_key)
+    raw_bytes = await audio.read()
+    async with session.lock:
+        state = session.state
+        if state.get("stage") != "interview":
+            raise HTTPException(409, "The interview is over.")
+        metrics.set_session(session_id)
+        question = state["current_question_to_ask"]
+        text, count, err, speech_stats = await asyncio.to_thread(
+            get_transcriber().transcribe_bytes, raw_bytes, session_id)
+        if err:
+            text, count = f"Error transcribing: {err}", 0
+        audio_handle = await asyncio.to_thread(get_store().put, session_id, raw_bytes)
+        async with session.state_lock:
+            state["answers"].append({
+                "question": question, "transcription": text, "filler_count": count,
+                "audio_handle": audio_handle, "speech_stats": speech_stats,
+            })
+            index = len(state["answers"]) - 1
+        if not batch_evaluation:
+            session.eval_queue.submit(index, question["question"], text, count, speech_stats)
+
+        followups = []
+        if not state["pending_followups"] and question.get("type") != "follow-up" and not err:
+            followups = await asyncio.to_thread(
+                ai_helpers.generate_followup_questions, session.gemini_key, question["question"], text)
+        async with session.state_lock:
+            _next_question(state, followups)
+            await asyncio.to_thread(session.persist)
+        return {"transcription": text, "filler_count": count, "speech_stats": speech_stats,
+                **session.status()}
+
+
+@app.post("/sessions/{session_id}/evaluate")
+async def evaluate(session_id: str, batch: bool = False, x_gemini_key: str | None = Header(None)):
+    """Queues grading for every answer that hasn't been graded yet; progress via /events."""
+    session = await _get_session(session_id, x_gemini_key)
+    queued = session.submit_ungraded(batch=batch)
+    await session.refresh()
+    return {"queued": queued, **session.status()}
+
+
+@app.get("/sessions/{session_id}/events")
+async def events(session_id: str, x_gemini_key: str | None = Header(None)):
+    """
+    Server-sent events with the session status whenever it changes, until the interview is over
+    and nothing is being graded any more. The final "done" event says how many answers are
+    still ungraded (e.g. batch_evaluation answers before /evaluate is called).
+    """
+    session = await _get_session(session_id, x_gemini_key)
+
+    async def stream():
+        last = None
+        while True:
+            await session.refresh()
+            status = session.status()
+            if status != last:
+                yield f"data: {json.dumps(status)}\n\n"
+                last = status
+            if status["stage"] != "interview" and (status["graded"] == status["answered"]
+                                                   or status["grading_in_flight"] == 0):
+                yield f"event: done\ndata: {json.dumps({'ungraded': status['answered'] - status['graded']})}\n\n"
+                return
+            session.last_used = time.monotonic()
+            await asyncio.sleep(EVENT_INTERVAL)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/sessions/{session_id}/feedback")
+async def feedback(session_id: str, x_gemini_key: str | None = Header(None)):
+    session = await _get_session(session_id, x_gemini_key)
+    await session.refresh()
+    return {"job_details": session.state.get("job_details"),
+            "answers": [{k: a.get(k) for k in ("question", "transcription", "filler_count", "speech_stats", "feedback_parsed")}
+                        for a in session.state.get("answers", [])],
+            **session.status()}
+
+
+@app.get("/sessions/{session_id}/report")
+async def report(session_id: str, x_gemini_key: str | None = Header(None)):
+    """PDF report of whatever has been graded so far."""
+    session = await _get_session(session_id, x_gemini_key)
+    await session.refresh()
+    async with session.state_lock:
+        await asyncio.to_thread(session.report.update, session.state)
+    pdf_bytes = await asyncio.to_thread(session.report.pdf_bytes)
+    return Response(pdf_bytes, media_type="application/pdf",
+                    headers={"Content-Disposition": 'attachment; filename="Interview_Report.pdf"'})
+
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    session = _sessions.pop(session_id, None)
+    if session is not None:
+        session.close()
+        if session.persister is not None:
+            await asyncio.to_thread(session.persister.delete)
+    elif re.fullmatch(r"[0-9a-f]{32}", session_id) and get_backend() is not None:
+        await asyncio.to_thread(SessionPersister(get_backend(), session_id).delete)
+    else:
+        raise HTTPException(404, "Unknown session.")
+    await asyncio.to_thread(get_store().drop_session, session_id)
+    return {"deleted": session_id}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -3,20 +3,31 @@ import os
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
 import streamlit as st
-import tempfile
 import cv2
-import threading
+import av
 import json 
 import random # <-- NEW IMPORT
+import re
+import uuid
 from streamlit_mic_recorder import mic_recorder
 from dotenv import load_dotenv
 from streamlit_webrtc import webrtc_streamer, VideoTransformerBase, RTCConfiguration
 
 # helpers
-from helpers import ai_helpers, pdf_helper, google_tts, transcribe
-from helpers.video_helper import init_detectors, analyze_frame
+from helpers import ai_helpers, google_tts, metrics
+from helpers.video_helper import init_pose, analyze_frame, FaceTracker, DetectorPool
 from helpers.feedback_helper import generate_posture_feedback
-from helpers.pdf_helper import extract_text_from_pdf
+from helpers.pdf_helper import extract_in_background
+from helpers.eval_queue import EvaluationQueue
+from helpers.prefetch import TTSPrefetcher
+from helpers.report_builder import ReportBuilder
+from helpers.session_store import SessionPersister, open_backend, SESSION_TTL
+from helpers.audio_pack import current_pack
+from helpers.audio_store import get_store
+from helpers.question_index import QuestionIndex
+from helpers.frame_worker import FrameAnalysisWorker
+from helpers.posture_store import PostureStore
+from helpers.transcribe_scheduler import TranscriptionScheduler
 
 # Load environment (.env)
 load_dotenv()
@@ -27,12 +38,95 @@ st.set_page_config(page_title="CrackGPT Interview Simulator", page_icon="🤖")
 st.title("🤖 CrackGPT: AI-Powered Interview Simulator")
 
 # --- Session state init ---
+# MediaPipe graphs are owned by a process-level pool and handed out per session
+@st.cache_resource
+def get_detector_pool():
+    return DetectorPool()
+
+# Optional metrics export: METRICS_PORT serves /metrics, METRICS_DIR receives per-session JSON traces
+# (plus a metrics.prom snapshot for textfile collectors)
+@st.cache_resource
+def start_metrics_server():
+    port = os.getenv("METRICS_PORT")
+    return metrics.serve_metrics(port) if port else None
+
+start_metrics_server()
+
+# Answer recordings are spilled to disk; session_state only holds their handles
+@st.cache_resource
+def get_audio_store():
+    store = get_store()
+    store.purge_stale()
+    return store
+
+def flush_session_metrics():
+    metrics_dir = os.getenv("METRICS_DIR")
+    if metrics_dir and st.session_state.get('session_id'):
+        metrics.write_session_trace(st.session_state.session_id, metrics_dir)
+        metrics.write_prometheus(os.path.join(metrics_dir, "metrics.prom"))
+    elif st.session_state.get('session_id'):
+        metrics.drop_session_trace(st.session_state.session_id)
+
+# Interview state is mirrored to SESSION_STORE_URL (SQLite by default) so a restart or another
+# app process can pick it up again from the ?session=<token> link
+@st.cache_resource
+def get_session_backend():
+    try:
+        backend = open_backend()
+    except Exception as e:
+        print(f"Session persistence disabled: {e}")
+        return None
+    if backend is not None:
+        backend.purge(SESSION_TTL)
+    return backend
+
+def get_persister():
+    if st.session_state.get('session_persister') is None and get_session_backend() is not None:
+        st.session_state.session_persister = SessionPersister(get_session_backend(), st.session_state.session_id)
+    return st.session_state.get('session_persister')
+
+def persist_session():
+    # Only fields that changed since the last call are written
+    persister = get_persister()
+    if persister is not None:
+        persister.sync(st.session_state)
+
+def resume_session(token):
+    if not token or not re.fullmatch(r"[0-9a-f]{32}", token) or get_session_backend() is None:
+        return False
+    persister = SessionPersister(get_session_backend(), token)
+    restored = {}
+    if not persister.restore(restored):
+        return False
+    st.session_state.clear()
+    st.session_state.session_id = token
+    st.session_state.update(restored)
+    st.session_state.session_persister = persister
+    return True
+
 def initialize_session():
+    if st.session_state.get('session_persister'):
+        st.session_state.session_persister.delete()
+    if st.session_state.get('eval_queue'):
+        st.session_state.eval_queue.shutdown()
+    if st.session_state.get('tts_prefetcher'):
+        st.session_state.tts_prefetcher.shutdown()
+    if st.session_state.get('report_builder'):
+        st.session_state.report_builder.shutdown()
+    if st.session_state.get('session_id'):
+        get_detector_pool().discard(st.session_state.session_id)
+        get_audio_store().drop_session(st.session_state.session_id)
+        flush_session_metrics()
     st.session_state.clear()
+    st.session_state.session_id = uuid.uuid4().hex
     st.session_state.stage = 'initial'
+    if get_session_backend() is not None:
+        st.query_params["session"] = st.session_state.session_id
 
 if 'stage' not in st.session_state:
-    initialize_session()
+    if not resume_session(st.query_params.get("session")):
+        initialize_session()
+metrics.set_session(st.session_state.session_id)
 
 # --- Sidebar ---
 with st.sidebar:
@@ -49,6 +143,8 @@ with st.sidebar:
     st.header("⚙️ Settings")
     st.session_state.disable_voice = st.checkbox("Disable voice playback", value=False)
     st.session_state.disable_video_analysis = st.checkbox("Disable posture analysis", value=False)
+    st.session_state.batch_evaluation = st.checkbox("Batch answer grading (fewer API calls)", value=False,
+                                                    help="Grade all answers together at the end, several per request, instead of one by one in the background.")
     st.markdown("---")
     st.header("📚 Question Bank")
     if st.button("Browse Pre-built Questions"):
@@ -60,8 +156,60 @@ with st.sidebar:
     st.markdown("👉 [Get Gemini key](https://aistudio.google.com/app/apikey)")
     st.markdown("👉 [Get HF token](https://huggingface.co/settings/tokens)")
 
+# One Whisper model per process behind a scheduler that batches answers from all sessions
+@st.cache_resource
+def get_transcriber(_token):
+    # The leading underscore keeps the token out of the cache key: there is one scheduler per
+    # process, and the token it is first built with (only used to fetch the model) is kept
+    transcriber = TranscriptionScheduler(hf_token=_token)
+    # Load the model now so the first answer doesn't pay for it
+    if os.getenv("WHISPER_WARMUP", "1") != "0":
+        transcriber.warm_up()
+    return transcriber
+
+transcriber = get_transcriber(hf_token)
+
+# Pre-rendered question bank audio (python -m helpers.audio_pack build), shared by all sessions;
+# picked up (and reloaded after a rebuild) without restarting the app
+def get_audio_pack():
+    return current_pack()
+
 def go_to(stage):
+    # Detectors are only needed during the interview; close them once the stream's worker lets go
+    if st.session_state.get('stage') == 'interview' and stage != 'interview':
+        get_detector_pool().discard(st.session_state.get('session_id'))
     st.session_state.stage = stage
+    persist_session()
+
+def get_eval_queue():
+    # Background grader for this session; answers are graded while the interview continues
+    if st.session_state.get('eval_queue') is None:
+        st.session_state.eval_queue = EvaluationQueue(gemini_api_key, max_workers=int(os.getenv("EVAL_CONCURRENCY", "2")),
+                                                      session_id=st.session_state.session_id)
+    return st.session_state.eval_queue
+
+def get_prefetcher():
+    # Synthesizes upcoming questions in the background; results also land in the TTS cache
+    if st.session_state.get('tts_prefetcher') is None:
+        st.session_state.tts_prefetcher = TTSPrefetcher(
+            lambda text: google_tts.tts_audio_bytes(text, api_key=google_api_key),
+            session_id=st.session_state.session_id)
+    return st.session_state.tts_prefetcher
+
+def get_report_builder():
+    # Holds what the report prints; the PDF itself is only built on download
+    if st.session_state.get('report_builder') is None:
+        st.session_state.report_builder = ReportBuilder(session_id=st.session_state.session_id)
+    return st.session_state.report_builder
+
+def prefetch_question_audio(texts):
+    """Starts TTS for questions we expect to ask soon (skipping ones the audio pack already has)."""
+    if st.session_state.get('disable_voice', False) or not google_api_key:
+        return
+    pack = get_audio_pack()
+    for text in texts:
+        if text and not (pack and pack.get(text) is not None):
+            get_prefetcher().prefetch(text)
 
 @st.cache_data
 def load_questions(filepath="questions.json"):
@@ -71,6 +219,11 @@ def load_questions(filepath="questions.json"):
     except FileNotFoundError: st.error(f"Error: {filepath} not found."); return []
     except json.JSONDecodeError: st.error(f"Error: Could not decode {filepath}."); return []
 
+# Facet index built once per process; filtering is bitset AND/OR instead of rescanning the bank
+@st.cache_resource
+def load_question_index(filepath="questions.json"):
+    return QuestionIndex(load_questions(filepath))
+
 # --- STAGE 1: Home / Setup Choice ---
 if st.session_state.stage == 'initial':
     # (No changes)
@@ -87,11 +240,16 @@ elif st.session_state.stage == 'ai_setup':
     # (No changes)
     st.subheader("AI Interview: Enter Job Details 👇")
     if st.button("⬅️ Back to Home"): go_to('initial')
+    # Outside the form so parsing starts on upload, while the job details are still being typed
+    resume_file = st.file_uploader("Upload Your Resume (Optional, PDF only)", type=["pdf"])
+    if resume_file and st.session_state.get('resume_extract', (None,))[0] != resume_file.file_id:
+        # Stops parsing once the 15,000-character budget is reached
+        st.session_state.resume_extract = (resume_file.file_id,
+                                           extract_in_background(resume_file, max_chars=15000))
     with st.form("job_form"):
         job_title = st.text_input("Job Title", placeholder="e.g., Python Developer")
         difficulty = st.selectbox("Difficulty", ["Easy", "Medium", "Hard"])
         job_description = st.text_area("Job Description", height=200)
-        resume_file = st.file_uploader("Upload Your Resume (Optional, PDF only)", type=["pdf"])
         num_questions = st.slider("Number of Questions", 3, 10, 3)
         submit = st.form_submit_button("Generate Interview Questions")
         if submit:
@@ -102,13 +260,12 @@ elif st.session_state.stage == 'ai_setup':
                         resume_text = None
                         if resume_file:
                             st.info("Reading resume...")
-                            resume_text, err = extract_text_from_pdf(resume_file)
+                            resume_text, err, truncated = st.session_state.resume_extract[1].result()
                             if err: st.error(err)
-                            if resume_text and len(resume_text) > 15000:
+                            if truncated:
                                 st.warning("Resume is long. Truncating.")
-                                resume_text = resume_text[:15000]
                         st.session_state.job_details = {"title": job_title, "difficulty": difficulty}
-                        st.session_state.posture_data = []
+                        st.session_state.posture_data = PostureStore()
                         st.session_state.resume_text = resume_text 
                         _, questions = ai_helpers.extract_skills_and_questions(
                             gemini_key=gemini_api_key, job_title=job_title,
@@ -128,20 +285,14 @@ elif st.session_state.stage == 'prebuilt_setup':
     # (No changes)
     st.header("🛠️ Pre-built Interview Setup")
     if st.button("⬅️ Back to Home"): go_to('initial')
-    questions = load_questions()
-    if questions:
-        all_subjects = sorted(list(set(q['main_subject'] for q in questions)))
-        all_difficulties = sorted(list(set(q.get('difficulty', 'N/A') for q in questions)))
-        all_categories = sorted(list(set(cat for q in questions for cat in q.get('categories', []))))
+    q_index = load_question_index()
+    if len(q_index):
         st.subheader("Filter Your Questions")
         col1, col2 = st.columns(2)
-        with col1: sel_subject = st.selectbox("Filter by Subject", ["All"] + all_subjects)
-        with col2: sel_difficulty = st.selectbox("Filter by Difficulty", ["All"] + all_difficulties)
-        sel_categories = st.multiselect("Filter by Category (acts as AND)", all_categories)
-        filtered_questions = questions
-        if sel_subject != "All": filtered_questions = [q for q in filtered_questions if q['main_subject'] == sel_subject]
-        if sel_difficulty != "All": filtered_questions = [q for q in filtered_questions if q.get('difficulty') == sel_difficulty]
-        if sel_categories: filtered_questions = [q for q in filtered_questions if all(cat in q.get('categories', []) for cat in sel_categories)]
+        with col1: sel_subject = st.selectbox("Filter by Subject", ["All"] + q_index.values('main_subject'))
+        with col2: sel_difficulty = st.selectbox("Filter by Difficulty", ["All"] + q_index.values('difficulty'))
+        sel_categories = st.multiselect("Filter by Category (acts as AND)", q_index.values('categories'))
+        filtered_questions = q_index.filter(sel_subject, sel_difficulty, sel_categories)
         st.write("---")
         st.markdown(f"**Found {len(filtered_questions)} questions matching your criteria.**")
         if filtered_questions:
@@ -153,7 +304,7 @@ elif st.session_state.stage == 'prebuilt_setup':
                 st.session_state.current_question_index = 0
                 st.session_state.current_question_to_ask = formatted_questions[0]
                 st.session_state.pending_followups = [] # <-- Initialize follow-up queue
-                st.session_state.posture_data = []
+                st.session_state.posture_data = PostureStore()
                 go_to('interview')
                 st.rerun()
             with st.expander("Preview Selected Questions"):
@@ -164,21 +315,19 @@ elif st.session_state.stage == 'browse':
     # (No changes)
     st.header("📚 Pre-built Question Bank")
     if st.button("⬅️ Back to Interview Setup"): go_to('initial')
-    questions = load_questions()
-    if questions:
-        all_subjects = sorted(list(set(q['main_subject'] for q in questions)))
-        all_difficulties = sorted(list(set(q['difficulty'] for q in questions)))
-        all_categories = sorted(list(set(cat for q in questions for cat in q['categories'])))
+    q_index = load_question_index()
+    if len(q_index):
+        subject_counts = q_index.facet_counts('main_subject')
+        difficulty_counts = q_index.facet_counts('difficulty')
         col1, col2 = st.columns(2)
-        with col1: sel_subject = st.selectbox("Filter by Subject", ["All"] + all_subjects)
-        with col2: sel_difficulty = st.selectbox("Filter by Difficulty", ["All"] + all_difficulties)
-        sel_categories = st.multiselect("Filter by Category (acts as AND)", all_categories)
-        filtered_questions = questions
-        if sel_subject != "All": filtered_questions = [q for q in filtered_questions if q['main_subject'] == sel_subject]
-        if sel_difficulty != "All": filtered_questions = [q for q in filtered_questions if q['difficulty'] == sel_difficulty]
-        if sel_categories: filtered_questions = [q for q in filtered_questions if all(cat in q['categories'] for cat in sel_categories)]
+        with col1: sel_subject = st.selectbox("Filter by Subject", ["All"] + q_index.values('main_subject'),
+                                              format_func=lambda v: v if v == "All" else f"{v} ({subject_counts[v]})")
+        with col2: sel_difficulty = st.selectbox("Filter by Difficulty", ["All"] + q_index.values('difficulty'),
+                                                 format_func=lambda v: v if v == "All" else f"{v} ({difficulty_counts[v]})")
+        sel_categories = st.multiselect("Filter by Category (acts as AND)", q_index.values('categories'))
+        filtered_questions = q_index.filter(sel_subject, sel_difficulty, sel_categories)
         st.write("---")
-        st.markdown(f"**Showing {len(filtered_questions)} of {len(questions)} questions:**")
+        st.markdown(f"**Showing {len(filtered_questions)} of {len(q_index)} questions:**")
         for q in filtered_questions:
             with st.expander(f"**{q['question']}**"):
                 st.markdown(f"**Answer:** {q['answer']}")
@@ -189,26 +338,35 @@ elif st.session_state.stage == 'interview':
     st.subheader(f"🎤 Interview for: {st.session_state.job_details.get('title','N/A')}")
     st.warning("🎧 Remember to use headphones!", icon="💡")
     
-    # Video setup (no changes)
-    lock = threading.Lock()
-    shared_data = {"posture_data_list": []}
+    # Video setup: recv() only hands frames to a background analysis worker, so the preview never stalls
+    analysis_enabled = not st.session_state.get('disable_video_analysis', False)
+    session_id, detector_pool = st.session_state.session_id, get_detector_pool()
     class VideoProcessor(VideoTransformerBase):
+        def __init__(self):
+            self.worker = None
+            if analysis_enabled:
+                # The analysis thread leases the session's graphs and hands them back when it exits
+                pose, face = detector_pool.acquire(session_id)
+                # Face detection every Nth frame, tracked from pose landmarks in between
+                self.tracker = FaceTracker(detect_every=int(os.getenv("FACE_DETECT_EVERY", "5")),
+                                           lite_pose_factory=lambda: init_pose(model_complexity=0))
+                def release_detectors():
+                    self.tracker.close()
+                    if pose is not None: detector_pool.release(session_id)
+                self.worker = FrameAnalysisWorker(lambda img: analyze_frame(img, pose, face, self.tracker),
+                                                  target_fps=float(os.getenv("FRAME_ANALYSIS_FPS", "4")),
+                                                  on_stop=release_detectors)
         def recv(self, frame):
             img = frame.to_ndarray(format="bgr24")
-            if not st.session_state.get('disable_video_analysis', False):
-                try:
-                    data = analyze_frame(img, pose, face)
-                    if data and not data.get("error"):
-                        with lock: shared_data["posture_data_list"].append(data)
-                except Exception as e: print(f"Error analyzing frame: {e}")
+            if self.worker: self.worker.submit(img)
             img = cv2.flip(img, 1)
             return av.VideoFrame.from_ndarray(img, format="bgr24")
-    if not st.session_state.get('disable_video_analysis', False): pose, face = init_detectors()
-    webrtc_streamer(key="video", video_processor_factory=VideoProcessor)
-    with lock:
-        if shared_data["posture_data_list"]:
-            st.session_state.posture_data.extend(shared_data["posture_data_list"])
-            shared_data["posture_data_list"].clear()
+        def on_ended(self):
+            if self.worker: self.worker.stop()
+    webrtc_ctx = webrtc_streamer(key="video", video_processor_factory=VideoProcessor)
+    if webrtc_ctx.video_processor and webrtc_ctx.video_processor.worker:
+        st.session_state.posture_data.extend(webrtc_ctx.video_processor.worker.drain())
+        st.session_state.frame_stats = webrtc_ctx.video_processor.worker.snapshot()
     
     st.write("---")
 
@@ -217,17 +375,22 @@ elif st.session_state.stage == 'interview':
         with st.spinner("Analyzing answer and preparing next question..."):
             try:
                 raw_bytes = st.session_state.temp_audio
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                    tmp.write(raw_bytes); tmp_path = tmp.name
-                text, count, err = transcribe.transcribe_file(tmp_path, hf_token)
-                os.remove(tmp_path)
+                # Decode in memory, no temp file round-trip
+                text, count, err, speech_stats = transcriber.transcribe_bytes(
+                    raw_bytes, st.session_state.session_id)
                 if err: text, count = f"Error transcribing: {err}", 0
                 
                 # Save Q&A pair
                 st.session_state.answers.append({
                     "question": st.session_state.current_question_to_ask,
-                    "transcription": text, "filler_count": count, "audio_bytes": raw_bytes
+                    "transcription": text, "filler_count": count,
+                    "audio_handle": get_audio_store().put(st.session_state.session_id, raw_bytes),
+                    "speech_stats": speech_stats
                 })
+                # Start grading right away instead of waiting for the end of the interview
+                if not st.session_state.get('batch_evaluation', False):
+                    get_eval_queue().submit(len(st.session_state.answers) - 1,
+                                            st.session_state.current_question_to_ask['question'], text, count, speech_stats)
                 
                 # --- NEW LOGIC: Decide next step ---
                 current_q_type = st.session_state.current_question_to_ask.get('type')
@@ -247,6 +410,7 @@ elif st.session_state.stage == 'interview':
                         text
                     )
                     st.session_state.pending_followups = follow_ups # Store the list
+                    prefetch_question_audio(follow_ups) # Start their audio right away
                     
                     if st.session_state.pending_followups:
                         # Ask the first follow-up next
@@ -272,6 +436,7 @@ elif st.session_state.stage == 'interview':
 
                 st.session_state.processing_answer = False
                 st.session_state.temp_audio = None
+                persist_session()
                 st.rerun()
 
             except Exception as e:
@@ -289,11 +454,23 @@ elif st.session_state.stage == 'interview':
             total_initial = len(st.session_state.initial_questions)
             st.info(f"Question {st.session_state.current_question_index + 1}/{total_initial}: {q_to_ask}")
 
+        # Look ahead: the next main question is synthesized while this one is being answered.
+        # Anything else still queued (e.g. follow-ups we've moved past) is cancelled.
+        next_idx = st.session_state.current_question_index + 1
+        next_main = st.session_state.initial_questions[next_idx]['question'] if next_idx < len(st.session_state.initial_questions) else None
+        if st.session_state.get('tts_prefetcher'):
+            st.session_state.tts_prefetcher.keep_only([q_to_ask, next_main] + list(st.session_state.pending_followups))
+        prefetch_question_audio([next_main])
+
         # Voice playback (changed to use google_api_key from env)
         if not st.session_state.get('disable_voice', False):
-            if google_api_key:
+            pack = get_audio_pack()
+            clip = pack.get(q_to_ask) if pack else None
+            if clip is not None:
+                st.audio(clip, format="audio/mpeg")
+            elif google_api_key:
                 try:
-                    audio = google_tts.tts_audio_bytes(q_to_ask, api_key=google_api_key)
+                    audio = get_prefetcher().get(q_to_ask, timeout=30) or google_tts.tts_audio_bytes(q_to_ask, api_key=google_api_key)
                     st.audio(audio, format="audio/mpeg")
                 except Exception as e:
                     st.warning(f"Google TTS failed: {e}")
@@ -309,30 +486,33 @@ elif st.session_state.stage == 'interview':
             st.session_state.processing_answer = True # Flag to trigger processing block
             st.rerun()
 
-# --- STAGE: Processing Stage (Unchanged) ---
+# --- STAGE: Processing Stage (waits only for answers still being graded) ---
 elif st.session_state.stage == 'processing':
-    # (code is the same)
     st.header("⚙️ Analyzing Your Interview...")
     total_answers = len(st.session_state.answers)
-    progress_bar = st.progress(0, text="Starting feedback generation...")
+    eval_queue = get_eval_queue()
+    # Anything that never made it into the queue (batch mode, or after an error) is submitted now
+    ungraded = [(i, a['question']['question'], a['transcription'], a['filler_count'], a.get('speech_stats'))
+                for i, a in enumerate(st.session_state.answers)
+                if 'feedback_parsed' not in a and not eval_queue.has(i)]
+    if st.session_state.get('batch_evaluation', False):
+        eval_queue.submit_batch(ungraded, batch_size=int(os.getenv("EVAL_BATCH_SIZE", "5")))
+    else:
+        for item in ungraded: eval_queue.submit(*item)
+    done = sum(1 for a in st.session_state.answers if 'feedback_parsed' in a)
+    progress_bar = st.progress(done / total_answers if total_answers else 1.0, text="Collecting feedback...")
     status_placeholder = st.empty()
-    for i, answer_data in enumerate(st.session_state.answers):
-        if 'feedback_parsed' in answer_data: continue
-        progress_text = f"Generating feedback for answer {i+1} of {total_answers}..."
-        status_placeholder.info(progress_text)
-        progress_bar.progress((i) / total_answers, text=progress_text)
-        try:
-            question_text = answer_data['question']['question']
-            transcription = answer_data['transcription']
-            filler_count = answer_data['filler_count']
-            parsed, _ = ai_helpers.evaluate_answer(
-                gemini_key=gemini_api_key, question=question_text, 
-                transcription=transcription, filler_count=filler_count)
+    for i, parsed in eval_queue.results():
+        if 'feedback_parsed' not in st.session_state.answers[i]:
             st.session_state.answers[i]['feedback_parsed'] = parsed
-        except Exception as e: st.session_state.answers[i]['feedback_parsed'] = {"error": f"Failed to generate feedback: {e}"}
+            done += 1
+        progress_text = f"Feedback ready for {done} of {total_answers} answers..."
+        status_placeholder.info(progress_text)
+        progress_bar.progress(done / total_answers, text=progress_text)
+    persist_session()
     progress_bar.progress(1.0, text="Analysis complete!")
     status_placeholder.success("✅ All answers processed successfully!")
-    if st.button("View Final Report"): go_to('feedback'); st.rerun()
+    if st.button("View Final Report"): flush_session_metrics(); go_to('feedback'); st.rerun()
 
 # --- STAGE: Final Feedback (MODIFIED only for display) ---
 elif st.session_state.stage == 'feedback':
@@ -343,12 +523,10 @@ elif st.session_state.stage == 'feedback':
         if st.session_state.posture_data:
             col1, col2 = st.columns(2)
             with col1:
-                valid_posture = [d["posture_score"] for d in st.session_state.posture_data if d.get("posture_score") is not None]
-                avg_posture = sum(valid_posture) / len(valid_posture) if valid_posture else 0
+                avg_posture = st.session_state.posture_data.mean("posture_score") or 0
                 st.metric("🧍 Avg. Posture Score", f"{round(avg_posture, 1)} / 10")
             with col2:
-                valid_hair = [d["hair_score"] for d in st.session_state.posture_data if d.get("hair_score") is not None]
-                avg_hair = sum(valid_hair) / len(valid_hair) if valid_hair else 0
+                avg_hair = st.session_state.posture_data.mean("hair_score") or 0
                 st.metric("💇 Avg. Hair Neatness", f"{round(avg_hair, 1)} / 10") # Note: Hair score removed in helper
             posture_feedback = generate_posture_feedback(st.session_state.posture_data)
             if posture_feedback:
@@ -374,6 +552,11 @@ elif st.session_state.stage == 'feedback':
              st.warning(f"Follow-up to Q{main_question_counter}: {question_text}") 
             
         st.text_area("Your Answer", data.get('transcription', 'No answer recorded.'), height=100, disabled=True, key=f"ans_{i}")
+        # Recording is only read back from disk when the candidate asks to hear it
+        if data.get('audio_handle') and st.toggle("🔊 Play your recording", key=f"play_{i}"):
+            recording = get_audio_store().read(data['audio_handle'])
+            if recording: st.audio(recording)
+            else: st.caption("Recording is no longer available.")
         
         fb = data.get('feedback_parsed', {})
         filler_count = data.get('filler_count', 0)
@@ -387,8 +570,9 @@ elif st.session_state.stage == 'feedback':
                     with st.expander("💡 See Suggested Answer"): st.markdown(fb['suggested_answer'])
                         
     st.write("---")
-    pdf_bytes = pdf_helper.create_pdf_report(st.session_state)
-    st.download_button("📄 Download Interview Report", data=pdf_bytes, file_name="Interview_Report.pdf", mime="application/pdf")
+    report_builder = get_report_builder()
+    report_builder.update(st.session_state)
+    st.download_button("📄 Download Interview Report", data=report_builder.pdf_bytes, file_name="Interview_Report.pdf", mime="application/pdf")
     
     if st.button("🔁 Start New Interview"):
         initialize_session()
@@ -0,0 +1,52 @@
+# benchmarks/bench_evaluation.py
+"""
+Compares one-by-one grading (evaluate_answer) with batched grading (evaluate_answers_batch)
+against a fake Gemini model, so no API key is needed.
+
+    python -m benchmarks.bench_evaluation --answers 12 --batch-size 5 --latency 0.8
+
+Reports request count, approximate prompt tokens and wall time for both paths.
+"""
+import argparse
+import json
+import time
+
+from benchmarks.fakes import FakeGemini, install_fake_gemini
+from helpers import ai_helpers
+
+
+def _items(n):
+    return [{"question": f"Question {i}: explain the trade-offs of approach {i}.",
+             "transcription": "I think the main trade-off is latency versus throughput, um, basically " * 6,
+             "filler_count": 3} for i in range(n)]
+
+
+def run(answers=12, batch_size=5, latency=0.8):
+    items = _items(answers)
+    report = {}
+
+    fake = FakeGemini(latency)
+    install_fake_gemini(fake)
+    t0 = time.perf_counter()
+    for it in items:
+        ai_helpers.evaluate_answer("fake-key", it["question"], it["transcription"], it["filler_count"])
+    report["single"] = {"requests": fake.requests, "approx_prompt_tokens": fake.prompt_chars // 4,
+                        "seconds": round(time.perf_counter() - t0, 3)}
+
+    fake = FakeGemini(latency)
+    install_fake_gemini(fake)
+    t0 = time.perf_counter()
+    for start in range(0, len(items), batch_size):
+        ai_helpers.evaluate_answers_batch("fake-key", items[start:start + batch_size])
+    report["batch"] = {"requests": fake.requests, "approx_prompt_tokens": fake.prompt_chars // 4,
+                       "seconds": round(time.perf_counter() - t0, 3), "batch_size": batch_size}
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--answers", type=int, default=12)
+    ap.add_argument("--batch-size", type=int, default=5)
+    ap.add_argument("--latency", type=float, default=0.8, help="simulated seconds per Gemini request")
+    args = ap.parse_args()
+    print(json.dumps(run(args.answers, args.batch_size, args.latency), indent=2))
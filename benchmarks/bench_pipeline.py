@@ -0,0 +1,201 @@
+# benchmarks/bench_pipeline.py
+"""
+Headless end-to-end benchmark of the interview pipeline, with no API keys needed.
+
+Gemini is replaced by FakeGemini, Google TTS / ElevenLabs by a local stub server,
+answers are synthetic WAVs and video is synthetic frames. Each simulated session runs:
+setup -> (TTS -> transcribe -> follow-ups -> evaluate) per question -> PDF report,
+plus frame analysis. Reports per-stage p50/p95/p99 and throughput as JSON.
+
+    python -m benchmarks.bench_pipeline --sessions 4 --questions 3 --out bench.json
+
+Stages whose dependencies aren't installed (faster-whisper, mediapipe, fpdf) are
+reported as skipped rather than failing the run.
+"""
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeGemini, install_fake_gemini, StubServer, synthetic_frame, synthetic_wav
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+        self.skipped = {}
+        self._lock = threading.Lock()
+
+    def run(self, stage, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        result = fn(*args, **kwargs)
+        with self._lock:
+            self.samples.setdefault(stage, []).append(time.perf_counter() - t0)
+        return result
+
+    def skip(self, stage, reason):
+        with self._lock:
+            self.skipped.setdefault(stage, reason)
+
+    def summary(self):
+        out = {}
+        for stage, xs in self.samples.items():
+            xs = sorted(xs)
+            out[stage] = {
+                "count": len(xs),
+                "mean_ms": round(statistics.fmean(xs) * 1000, 2),
+                "p50_ms": round(_pct(xs, 50) * 1000, 2),
+                "p95_ms": round(_pct(xs, 95) * 1000, 2),
+                "p99_ms": round(_pct(xs, 99) * 1000, 2),
+            }
+        for stage, reason in self.skipped.items():
+            out.setdefault(stage, {"skipped": reason})
+        return out
+
+
+def _pct(sorted_xs, p):
+    if not sorted_xs:
+        return 0.0
+    k = (len(sorted_xs) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_xs) - 1)
+    return sorted_xs[lo] + (sorted_xs[hi] - sorted_xs[lo]) * (k - lo)
+
+
+def run_session(timer, session_no, args, wav_bytes, frames):
+    from helpers import ai_helpers, eleven, google_tts, pdf_helper, transcribe
+
+    # Every session asks for the same questions, so with --llm-cache these are all hits
+    # (main() warms the cache and times that cold call on its own)
+    _, questions = timer.run("question_setup_cached" if args.llm_cache else "question_setup",
+                             _question_setup, args, use_cache=args.llm_cache)
+    answers = []
+    # A per-session title keeps the report content distinct, so its first render is a cache miss
+    state = {"job_details": {"title": f"Benchmark {session_no}", "difficulty": "Medium"}, "answers": answers}
+
+    if session_no == 0:
+        timer.run("eleven_voices", eleven.fetch_elevenlabs_voices, "fake-key")
+
+    for q in questions:
+        text = q["question"]
+        timer.run("tts_google", google_tts.tts_audio_bytes, text, api_key="fake-key", use_cache=args.tts_cache)
+        if args.eleven:
+            timer.run("tts_eleven", eleven.tts_audio_bytes, "fake-key", "bench", text, use_cache=args.tts_cache)
+
+        if wav_bytes is not None:
+            transcription, fillers, err = timer.run("transcribe", transcribe.transcribe_bytes, wav_bytes, None)
+            if err:
+                timer.skip("transcribe", err)
+                transcription, fillers = "I would start by profiling the hot path.", 1
+        else:
+            transcription, fillers = "I would start by profiling the hot path.", 1
+
+        timer.run("followups", ai_helpers.generate_followup_questions, "fake-key", text, transcription)
+        parsed, _ = timer.run("evaluate", ai_helpers.evaluate_answer, "fake-key", text, transcription, fillers)
+        answers.append({"question": q, "transcription": transcription, "filler_count": fillers,
+                        "feedback_parsed": parsed})
+
+    if frames:
+        from helpers.video_helper import DetectorPool, FaceTracker, analyze_frame
+        pool = DetectorPool()
+        pose, face = pool.acquire(f"bench-{session_no}")
+        if pose is None:
+            timer.skip("frame_analysis", "mediapipe not available")
+        else:
+            tracker = FaceTracker() if args.face_tracking else None
+            for frame in frames:
+                timer.run("frame_analysis", analyze_frame, frame, pose, face, tracker)
+            pool.release(f"bench-{session_no}")
+            pool.discard(f"bench-{session_no}")
+
+    try:
+        timer.run("pdf_report", pdf_helper.create_pdf_report, state)
+        timer.run("pdf_report_cached", pdf_helper.create_pdf_report, state)
+    except Exception as e:
+        timer.skip("pdf_report", str(e))
+    return len(answers)
+
+
+def _question_setup(args, use_cache):
+    from helpers import ai_helpers
+    return ai_helpers.extract_skills_and_questions(
+        "fake-key", "Backend Engineer", "Python, SQL, distributed systems.",
+        num_questions=args.questions, difficulty="Medium", use_cache=use_cache)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sessions", type=int, default=4, help="simulated interviews")
+    ap.add_argument("--concurrency", type=int, default=4, help="interviews run at once")
+    ap.add_argument("--questions", type=int, default=3)
+    ap.add_argument("--gemini-latency", type=float, default=0.8)
+    ap.add_argument("--tts-latency", type=float, default=0.3)
+    ap.add_argument("--answer-seconds", type=float, default=5.0)
+    ap.add_argument("--frames", type=int, default=20, help="synthetic frames analyzed per session")
+    ap.add_argument("--eleven", action="store_true", help="also exercise ElevenLabs TTS")
+    ap.add_argument("--tts-cache", action="store_true", help="let TTS go through the audio cache")
+    ap.add_argument("--llm-cache", action="store_true",
+                    help="let question setup go through the (temporary) LLM cache")
+    ap.add_argument("--no-face-tracking", dest="face_tracking", action="store_false")
+    ap.add_argument("--skip-whisper", action="store_true")
+    ap.add_argument("--out", help="write the JSON report here as well as to stdout")
+    args = ap.parse_args()
+
+    from helpers import eleven, google_tts
+
+    gemini = FakeGemini(latency=args.gemini_latency, jitter=0.2)
+    install_fake_gemini(gemini)
+
+    wav_bytes = None
+    if not args.skip_whisper:
+        try:
+            import faster_whisper  # noqa: F401
+            wav_bytes = synthetic_wav(args.answer_seconds)
+        except ImportError:
+            pass
+
+    frames = []
+    if args.frames:
+        try:
+            frames = [synthetic_frame(seed=i) for i in range(args.frames)]
+        except ImportError:
+            frames = []
+
+    timer = StageTimer()
+    if wav_bytes is None:
+        timer.skip("transcribe", "faster-whisper not installed or --skip-whisper")
+    if not frames and args.frames:
+        timer.skip("frame_analysis", "numpy not installed")
+
+    with StubServer(latency=args.tts_latency) as stub:
+        google_tts.API_BASE = stub.base_url
+        eleven.API_BASE = stub.base_url
+        if args.llm_cache:
+            timer.run("question_setup_cold", _question_setup, args, use_cache=True)
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            answered = sum(pool.map(lambda n: run_session(timer, n, args, wav_bytes, frames), range(args.sessions)))
+        wall = time.perf_counter() - t0
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "stages": timer.summary(),
+        "throughput": {
+            "wall_seconds": round(wall, 3),
+            "sessions_per_minute": round(args.sessions / wall * 60, 2),
+            "answers_per_minute": round(answered / wall * 60, 2),
+        },
+        "external_calls": {"gemini_requests": gemini.requests, "tts_http_requests": stub.requests},
+        "host": {"cpu_count": os.cpu_count()},
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
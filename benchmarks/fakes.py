@@ -0,0 +1,185 @@
+# benchmarks/fakes.py
+"""
+Local stand-ins for the external services, with configurable injected latency:
+- FakeGemini replaces the google.generativeai module used by ai_helpers (install_fake_gemini)
+- StubServer is a local HTTP server answering like Google TTS and ElevenLabs
+- synthetic_wav / synthetic_frame generate inputs for transcribe and analyze_frame
+"""
+import base64
+import io
+import json
+import math
+import os
+import random
+import re
+import struct
+import tempfile
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_FEEDBACK = {"technical_score": 7, "confidence_score": 6, "communication_score": 8,
+                 "positives": ["Clear structure"], "improvements": ["Add an example"],
+                 "suggested_answer": "..."}
+
+
+class FakeGemini:
+    """Stands in for google.generativeai: counts requests/prompt size and sleeps like a real call."""
+
+    def __init__(self, latency=0.8, per_1k_tokens=0.05, jitter=0.0):
+        self.latency = latency
+        self.per_1k_tokens = per_1k_tokens
+        self.jitter = jitter
+        self.requests = 0
+        self.prompt_chars = 0
+        self._lock = threading.Lock()
+
+    # genai module surface used by llm_client
+    def configure(self, api_key=None):
+        pass
+
+    def GenerativeModel(self, name):
+        return self
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.requests += 1
+            self.prompt_chars += len(prompt)
+        delay = self.latency + self.per_1k_tokens * len(prompt) / 4000
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        time.sleep(delay)
+        return type("Resp", (), {"text": self._answer(prompt)})()
+
+    @staticmethod
+    def _answer(prompt):
+        n = len(re.findall(r"^\[\d+\]$", prompt, flags=re.M))
+        if n:
+            body = json.dumps([dict(FAKE_FEEDBACK, index=i) for i in range(n)])
+        elif "follow-up question" in prompt:
+            return "Why did you choose that approach?\nWhat would you do differently at scale?"
+        elif "extract key skills" in prompt:
+            body = json.dumps({"skills": ["python", "sql", "system design"]})
+        elif 'keys "question" and "type"' in prompt:
+            m = re.search(r"Generate (\d+)", prompt)
+            body = json.dumps([{"question": f"Benchmark question {i}?", "type": "technical"}
+                               for i in range(int(m.group(1)) if m else 3)])
+        else:
+            body = json.dumps(FAKE_FEEDBACK)
+        return "```json\n" + body + "\n```"
+
+
+def install_fake_gemini(fake, rpm=1e9, max_concurrency=64):
+    """
+    Routes ai_helpers' Gemini calls to `fake`. The shared client's rate limit is lifted by
+    default so the benchmark measures the pipeline rather than the quota, and the response
+    cache is swapped for a throwaway file so runs never read or write the user's real one.
+    """
+    from helpers import llm_cache, llm_client
+    cache_dir = tempfile.mkdtemp(prefix="crackgpt-bench-")
+    with llm_cache._DEFAULT_LOCK:
+        llm_cache._DEFAULT = llm_cache.LLMCache(path=os.path.join(cache_dir, "llm.sqlite"))
+    llm_client.genai = fake
+    llm_client.RPM = rpm
+    llm_client.MAX_CONCURRENCY = max_concurrency
+    llm_client.INITIAL_CONCURRENCY = max_concurrency
+    llm_client.reset_clients()
+
+
+class StubServer:
+    """
+    Local HTTP server that answers the Google TTS synthesize endpoint and the
+    ElevenLabs voices / text-to-speech endpoints after `latency` seconds.
+    """
+
+    def __init__(self, latency=0.3, audio_bytes=16000):
+        self.latency = latency
+        self.audio = b"\xff\xf3" + b"\x00" * max(0, audio_bytes - 2)  # MP3-ish payload
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, ctype):
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                stub.requests += 1
+                time.sleep(stub.latency)
+                if self.path.startswith("/v1/voices"):
+                    self._send(200, json.dumps({"voices": [{"voice_id": "bench", "name": "Bench"}]}).encode(), "application/json")
+                else:
+                    self._send(404, b"{}", "application/json")
+
+            def do_POST(self):
+                stub.requests += 1
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                time.sleep(stub.latency)
+                if self.path.startswith("/v1/text:synthesize"):
+                    body = json.dumps({"audioContent": base64.b64encode(stub.audio).decode()}).encode()
+                    self._send(200, body, "application/json")
+                elif self.path.startswith("/v1/text-to-speech/"):
+                    self._send(200, stub.audio, "audio/wav")
+                else:
+                    self._send(404, b"{}", "application/json")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def synthetic_wav(seconds=5.0, rate=16000, seed=0):
+    """16-bit mono WAV with a voice-like mix of tones and noise, as raw bytes."""
+    rnd = random.Random(seed)
+    n = int(seconds * rate)
+    frames = bytearray()
+    for i in range(n):
+        t = i / rate
+        envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 3 * t)  # ~syllable rate
+        v = envelope * (0.3 * math.sin(2 * math.pi * 180 * t) + 0.2 * math.sin(2 * math.pi * 420 * t))
+        v += rnd.uniform(-0.05, 0.05)
+        frames += struct.pack("<h", int(max(-1.0, min(1.0, v)) * 32767))
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(frames))
+    return buf.getvalue()
+
+
+def synthetic_frame(width=640, height=480, seed=0):
+    """BGR frame with a face-like blob on a noisy background."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(40, 90, size=(height, width, 3), dtype=np.uint8)
+    yy, xx = np.ogrid[:height, :width]
+    cx, cy, r = width // 2, height // 3, height // 7
+    mask = (xx - cx) ** 2 + ((yy - cy) * 0.8) ** 2 <= r ** 2
+    frame[mask] = (120, 160, 210)
+    frame[height // 2:, width // 4: 3 * width // 4] = (90, 60, 40)  # shoulders/torso
+    return frame
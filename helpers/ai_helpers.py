@@ -1,39 +1,77 @@
 # helpers/ai_helpers.py
 import json
-import google.generativeai as genai
 import random # <-- NEW IMPORT
 
-def configure_gemini(key):
-    genai.configure(api_key=key)
+from . import metrics
+from . import llm_cache
+from . import llm_client
+from .llm_client import INTERACTIVE, BULK
 
-def extract_skills_and_questions(gemini_key, job_title, job_description, num_questions=5, difficulty="Medium", resume_text=None):
-    # (No changes in this function)
-    configure_gemini(gemini_key)
-    model = genai.GenerativeModel('gemini-flash-latest') 
+MODEL_NAME = 'gemini-flash-latest'
+
+def _generate(gemini_key, prompt, stage, priority=BULK):
+    # Every Gemini call goes through the shared client for its key: reused model handle,
+    # rate limit, adaptive concurrency, 429 retries, plus timing and token usage
+    return llm_client.get_client(gemini_key).generate(MODEL_NAME, prompt, stage, priority=priority)
+
+def _cache_get(namespace, use_cache, **inputs):
+    # Returns (key, cached value or None); key is None when caching is off/unavailable
+    cache = llm_cache.get_cache() if use_cache else None
+    if cache is None:
+        return None, None
+    key = llm_cache.make_key(namespace, MODEL_NAME, **inputs)
+    value = cache.get(key)
+    metrics.inc("llm_cache_total", stage=namespace, result="hit" if value is not None else "miss")
+    return key, value
+
+def _cache_put(key, value, ttl=None):
+    cache = llm_cache.get_cache() if key else None
+    if cache is not None:
+        cache.put(key, value, ttl=ttl)
+
+def extract_skills_and_questions(gemini_key, job_title, job_description, num_questions=5, difficulty="Medium", resume_text=None,
+                                 use_cache=True, cache_ttl=None):
+    """
+    Returns (skills, questions). Results are cached on disk keyed by the model and the
+    (whitespace-normalized) job title, description, resume, question count and difficulty;
+    pass use_cache=False to force a fresh generation.
+    """
+    cache_key, cached = _cache_get("extract_skills_and_questions", use_cache, job_title=job_title,
+                                   job_description=job_description, num_questions=int(num_questions),
+                                   difficulty=difficulty, resume_text=resume_text or "")
+    if cached is not None:
+        return cached[0], cached[1]
     skills_prompt_context = f"Here is the Job Description:\n{job_description}\n"
     if resume_text: skills_prompt_context += f"Here is the Candidate's Resume:\n{resume_text}\n"
     skills_prompt = f"""You are an expert technical interviewer. Analyze the context.\n{skills_prompt_context}\nBased *only* on the Job Description, extract key skills. Return JSON."""
-    skills_resp = model.generate_content(skills_prompt)
+    skills_resp = _generate(gemini_key, skills_prompt, "llm_extract_skills", INTERACTIVE)
     skills_text = skills_resp.text.strip().replace('```json', '').replace('```', '').strip()
+    parsed_ok = True
     try: extracted_skills = json.loads(skills_text)
-    except json.JSONDecodeError: extracted_skills = {"error": "Failed to parse skills JSON", "raw_text": skills_text}
+    except json.JSONDecodeError: extracted_skills = {"error": "Failed to parse skills JSON", "raw_text": skills_text}; parsed_ok = False
     question_prompt_context = f"**Job Description:**\n{job_description}\n**Extracted Skills:**\n{json.dumps(extracted_skills)}\n"
     if resume_text: question_prompt_context += f"\n**Candidate's Resume:**\n{resume_text}\n"
     questions_prompt = f"""You are an interviewer for a {difficulty} {job_title} role. Generate {int(num_questions)} diverse questions based on:\n{question_prompt_context}\n**Strategy:** Gap Analysis, Resume Deep Dive, Standard Questions. Return JSON array with keys "question" and "type"."""
-    questions_resp = model.generate_content(questions_prompt)
+    questions_resp = _generate(gemini_key, questions_prompt, "llm_generate_questions", INTERACTIVE)
     questions_text = questions_resp.text.strip().replace('```json', '').replace('```', '').strip()
     try: generated_questions = json.loads(questions_text)
-    except json.JSONDecodeError: generated_questions = [{"question": "Tell me about your experience.", "type": "general"}]
+    except json.JSONDecodeError: generated_questions = [{"question": "Tell me about your experience.", "type": "general"}]; parsed_ok = False
+    # Fallback answers are never cached, so the next attempt gets a real retry
+    if parsed_ok:
+        _cache_put(cache_key, [extracted_skills, generated_questions], ttl=cache_ttl)
     return extracted_skills, generated_questions
 
 # --- MODIFICATION: Generate 0 to 2 follow-ups ---
-def generate_followup_questions(gemini_key, original_question, user_answer):
+def generate_followup_questions(gemini_key, original_question, user_answer, use_cache=False, cache_ttl=None):
     """
     Generates 0 to 2 challenging follow-up questions based on the user's answer.
     Returns a LIST of question strings.
+    The follow-up count is random on purpose, so this is only cached when use_cache=True.
     """
-    configure_gemini(gemini_key)
-    model = genai.GenerativeModel('gemini-flash-latest') 
+    cache_key, cached = _cache_get("generate_followup_questions", use_cache,
+                                   original_question=original_question, user_answer=user_answer)
+    if cached is not None:
+        return cached
     
     # Decide how many follow-ups to ask (0, 1, or 2)
     num_followups = random.randint(0, 2) 
@@ -53,10 +91,12 @@ If asking multiple, make them distinct.
 Return *only* the question texts, separated by a newline character if there are multiple. Do not add numbering or commentary.
 """
     try:
-        response = model.generate_content(prompt)
+        response = _generate(gemini_key, prompt, "llm_followups", INTERACTIVE)
         # Split the response into a list of questions
         follow_ups = [q.strip() for q in response.text.strip().split('\n') if q.strip()]
-        return follow_ups[:num_followups] # Ensure we don't return more than requested
+        follow_ups = follow_ups[:num_followups] # Ensure we don't return more than requested
+        _cache_put(cache_key, follow_ups, ttl=cache_ttl)
+        return follow_ups
     except Exception as e:
         print(f"Follow-up question error: {e}")
         if num_followups > 0:
@@ -65,37 +105,156 @@ Return *only* the question texts, separated by a newline character if there are
              return []
 
 
-def evaluate_answer(gemini_key, question, transcription, filler_count):
-    configure_gemini(gemini_key)
-    # --- MODIFICATION: Use non-lite model for potentially better feedback ---
-    model = genai.GenerativeModel('gemini-flash-latest') 
-    
-    feedback_prompt = f"""
-You are an expert interviewer providing feedback. Evaluate the following answer in structured JSON.
-Question: "{question}"
-Candidate Answer: "{transcription}"
-AUDIO ANALYSIS: Candidate used ~{filler_count} filler words (um, ah, like).
-
-Assess these keys:
+# Shared by the single and batched graders so both ask for the same structure
+FEEDBACK_KEYS_SPEC = """Assess these keys:
 - "technical_score": integer 1–10 (accuracy, depth)
 - "confidence_score": integer 1–10 (Informed by filler words, fluency, hesitation)
 - "communication_score": integer 1–10 (clarity, structure)
 - "positives": list of short bullet points (what was done well)
 - "improvements": list of specific, actionable advice
-- "suggested_answer": an improved, ideal version of the answer
+- "suggested_answer": an improved, ideal version of the answer"""
 
-Return ONLY the single, clean JSON object. Ensure scores reflect quality and filler words.
-"""
-    resp = model.generate_content(feedback_prompt)
-    fb_text = resp.text.strip().replace('```json', '').replace('```', '').strip()
-    try:
-        parsed = json.loads(fb_text)
-    except json.JSONDecodeError:
-        parsed = {"raw_feedback": fb_text}
+
+def _strip_fences(text):
+    return text.strip().replace('```json', '').replace('```', '').strip()
+
+
+def _speech_line(speech_stats):
+    # Extra delivery signals from the transcription pass (pauses, speaking rate)
+    if not speech_stats or not speech_stats.get("word_count"):
+        return ""
+    wpm = speech_stats.get("words_per_minute")
+    line = f"SPEECH TIMING: {speech_stats.get('pause_count', 0)} pauses over 0.5s (longest {speech_stats.get('longest_pause_s', 0)}s)"
+    if wpm:
+        line += f", ~{wpm} words per minute"
+    fillers = speech_stats.get("fillers")
+    if fillers:
+        line += ", fillers: " + ", ".join(f'"{k}" x{v}' for k, v in fillers.items())
+    return line + ".\n"
+
+
+def _normalize_feedback(parsed):
     for k in ["technical_score", "confidence_score", "communication_score"]:
         try: parsed[k] = int(parsed.get(k))
         except (ValueError, TypeError): parsed[k] = None
     parsed.setdefault("positives", [])
     parsed.setdefault("improvements", [])
     parsed.setdefault("suggested_answer", "No suggestion available.")
-    return parsed, fb_text
\ No newline at end of file
+    return parsed
+
+
+def evaluate_answer(gemini_key, question, transcription, filler_count, speech_stats=None, priority=BULK):
+    feedback_prompt = f"""
+You are an expert interviewer providing feedback. Evaluate the following answer in structured JSON.
+Question: "{question}"
+Candidate Answer: "{transcription}"
+AUDIO ANALYSIS: Candidate used ~{filler_count} filler words (um, ah, like).
+{_speech_line(speech_stats)}
+{FEEDBACK_KEYS_SPEC}
+
+Return ONLY the single, clean JSON object. Ensure scores reflect quality and filler words.
+"""
+    resp = _generate(gemini_key, feedback_prompt, "llm_evaluate", priority)
+    fb_text = _strip_fences(resp.text)
+    try:
+        parsed = json.loads(fb_text)
+    except json.JSONDecodeError:
+        parsed = {"raw_feedback": fb_text}
+    return _normalize_feedback(parsed), fb_text
+
+
+def _parse_batch_items(text):
+    """
+    Pulls feedback objects out of a batch response. Tries the whole JSON array first,
+    then falls back to decoding each top-level {...} object on its own so one broken
+    entry doesn't take the others down with it.
+    Returns (items, complete); complete is False when anything had to be skipped, in which
+    case an item's position no longer says which answer it belongs to.
+    """
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data.get("results") or data.get("items") or [data]
+        if isinstance(data, list):
+            items = [d for d in data if isinstance(d, dict)]
+            return items, len(items) == len(data)
+    except json.JSONDecodeError:
+        pass
+
+    decoder = json.JSONDecoder()
+    items, pos, complete = [], 0, True
+    while True:
+        start = text.find('{', pos)
+        if start == -1:
+            break
+        try:
+            obj, end = decoder.raw_decode(text, start)
+        except json.JSONDecodeError:
+            # Skip past this brace and look for the next object
+            pos = start + 1
+            complete = False
+            continue
+        if isinstance(obj, dict):
+            items.append(obj)
+        pos = end
+    return items, complete
+
+
+def evaluate_answers_batch(gemini_key, items, priority=BULK):
+    """
+    Grades several answers in a single Gemini request.
+    `items` is a list of dicts with "question", "transcription", "filler_count" and optionally "speech_stats".
+    Returns (list_of_parsed_feedback, raw_text), one feedback dict per item, in order.
+    Entries missing from or unparsable in the batch response are re-graded one by one.
+    """
+    if not items:
+        return [], ""
+
+    answers_block = "\n".join(
+        f"""[{n}]
+Question: "{it['question']}"
+Candidate Answer: "{it['transcription']}"
+AUDIO ANALYSIS: Candidate used ~{it['filler_count']} filler words (um, ah, like).
+{_speech_line(it.get('speech_stats'))}"""
+        for n, it in enumerate(items)
+    )
+    batch_prompt = f"""
+You are an expert interviewer providing feedback. Evaluate EACH of the {len(items)} answers below independently in structured JSON.
+{answers_block}
+For each answer, {FEEDBACK_KEYS_SPEC[0].lower() + FEEDBACK_KEYS_SPEC[1:]}
+- "index": the number in square brackets of the answer being evaluated
+
+Return ONLY a JSON array with exactly {len(items)} objects, one per answer, in the same order. Ensure scores reflect quality and filler words.
+"""
+    try:
+        resp = _generate(gemini_key, batch_prompt, "llm_evaluate_batch", priority)
+        raw_text = _strip_fences(resp.text)
+    except Exception as e:
+        print(f"Batch evaluation error: {e}")
+        raw_text = ""
+
+    parsed_items, complete = _parse_batch_items(raw_text) if raw_text else ([], True)
+    # Without an "index", an object's position only identifies its answer if nothing was skipped
+    positional = complete and len(parsed_items) == len(items)
+    by_index = {}
+    for pos, obj in enumerate(parsed_items):
+        idx = obj.pop("index", None)
+        try: idx = int(idx) if idx is not None else (pos if positional else None)
+        except (ValueError, TypeError): idx = pos if positional else None
+        if idx is not None and 0 <= idx < len(items) and idx not in by_index:
+            by_index[idx] = obj
+
+    results = []
+    for n, it in enumerate(items):
+        obj = by_index.get(n)
+        if obj is not None and any(k in obj for k in ("technical_score", "positives", "suggested_answer")):
+            results.append(_normalize_feedback(obj))
+            continue
+        # Per-item fallback to the one-by-one path
+        try:
+            parsed, _ = evaluate_answer(gemini_key, it['question'], it['transcription'], it['filler_count'],
+                                        it.get('speech_stats'), priority=priority)
+        except Exception as e:
+            parsed = {"error": f"Failed to generate feedback: {e}"}
+        results.append(parsed)
+    return results, raw_text
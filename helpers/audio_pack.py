@@ -0,0 +1,191 @@
+# helpers/audio_pack.py
+"""
+Pre-synthesized audio for the questions.json bank.
+
+Build (re-run after editing questions.json; only new/changed questions are synthesized):
+    python -m helpers.audio_pack build --voices en-US-Wavenet-D
+
+Layout in the output dir:
+    questions.<hash>.pack  all MP3 clips back to back, named by content hash
+    questions.idx.json     {"pack": "questions.<hash>.pack", "clips": {clip_key: {"offset", "length", "voice"}}}
+
+A rebuild writes a new pack file and then swaps the index that names it, so a reader
+always gets an index together with the pack it was built for.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import glob
+import os
+import threading
+
+DEFAULT_DIR = os.getenv("AUDIO_PACK_DIR", "audio_pack")
+DEFAULT_VOICE = "en-US-Wavenet-D"
+PACK_NAME = "questions.pack"  # packs built before the index named its pack file
+INDEX_NAME = "questions.idx.json"
+
+
+def clip_key(text, voice=DEFAULT_VOICE):
+    return hashlib.sha256(f"{voice}\n{text}".encode("utf-8")).hexdigest()
+
+
+class AudioPack:
+    """Read-only view over a built pack. Clips are sliced out of a shared mmap."""
+
+    def __init__(self, pack_dir=DEFAULT_DIR):
+        with open(os.path.join(pack_dir, INDEX_NAME), "r", encoding="utf-8") as f:
+            self.signature = _signature(os.fstat(f.fileno()))
+            meta = json.load(f)
+        self.index = meta.get("clips", {})
+        self._file = open(os.path.join(pack_dir, meta.get("pack", PACK_NAME)), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, text, voice=DEFAULT_VOICE):
+        """Returns the clip bytes for this question text, or None if it isn't in the pack."""
+        entry = self.index.get(clip_key(text, voice))
+        if entry is None or self._mm is None:
+            return None
+        start = entry["offset"]
+        return self._mm[start:start + entry["length"]]
+
+    def close(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            self._file.close()
+
+
+def _signature(st):
+    # A rebuild replaces the index file, which changes at least one of these
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def pack_exists(pack_dir=DEFAULT_DIR):
+    return os.path.exists(os.path.join(pack_dir, INDEX_NAME))
+
+
+def load_pack(pack_dir=DEFAULT_DIR):
+    """Returns an AudioPack, or None if it hasn't been built."""
+    try:
+        return AudioPack(pack_dir)
+    except (OSError, ValueError) as e:
+        print(f"Audio pack not loaded ({pack_dir}): {e}")
+        return None
+
+
+_current = {}  # pack_dir -> (AudioPack or None, index signature it was loaded/tried for)
+_current_lock = threading.Lock()
+
+
+def current_pack(pack_dir=DEFAULT_DIR):
+    """
+    The pack as currently built, or None. Loaded once and reloaded only when a rebuild has
+    swapped the index. The previous AudioPack isn't closed: callers still holding it keep
+    reading a consistent (older) index/pack pair until they let go of it.
+    """
+    try:
+        sig = _signature(os.stat(os.path.join(pack_dir, INDEX_NAME)))
+    except OSError:
+        return None
+    with _current_lock:
+        pack, loaded_sig = _current.get(pack_dir, (None, None))
+        if loaded_sig == sig:
+            return pack
+        new = load_pack(pack_dir)
+        if new is not None:
+            _current[pack_dir] = (new, new.signature)
+            return new
+        # Don't retry (and re-report) a broken index until it changes; keep serving the last good pack
+        _current[pack_dir] = (pack, sig)
+        return pack
+
+
+def build_pack(questions, voices, api_key=None, pack_dir=DEFAULT_DIR):
+    """
+    Writes the pack for every (question, voice) pair. Clips whose text and voice
+    are unchanged are copied from the previous pack; only the rest hit the TTS API.
+    Returns (reused, synthesized).
+    """
+    from . import google_tts
+
+    old = load_pack(pack_dir) if pack_exists(pack_dir) else None
+    os.makedirs(pack_dir, exist_ok=True)
+    index_path = os.path.join(pack_dir, INDEX_NAME)
+    tmp_pack = os.path.join(pack_dir, f"questions.{os.getpid()}.pack.tmp")
+    tmp_index = index_path + ".tmp"
+
+    clips, reused, synthesized = {}, 0, 0
+    offset = 0
+    digest = hashlib.sha256()
+    try:
+        with open(tmp_pack, "wb") as out:
+            for voice in voices:
+                for q in questions:
+                    text = q["question"]
+                    key = clip_key(text, voice)
+                    if key in clips:
+                        continue
+                    audio = old.get(text, voice) if old else None
+                    if audio is not None:
+                        reused += 1
+                    else:
+                        audio = google_tts.tts_audio_bytes(text, api_key=api_key, voice_name=voice)
+                        synthesized += 1
+                    out.write(audio)
+                    digest.update(audio)
+                    clips[key] = {"offset": offset, "length": len(audio), "voice": voice}
+                    offset += len(audio)
+        pack_name = f"questions.{digest.hexdigest()[:16]}.pack"
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump({"version": 2, "pack": pack_name, "clips": clips}, f)
+        if old:
+            old.close()
+            old = None
+        # The new pack goes in under its own name; swapping the index is the only switch-over
+        os.replace(tmp_pack, os.path.join(pack_dir, pack_name))
+        os.replace(tmp_index, index_path)
+    finally:
+        if old:
+            old.close()
+        for path in (tmp_pack, tmp_index):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # Older packs are no longer named by the index; processes that still have one open keep
+    # their mapping (deletion fails harmlessly on Windows, where the file is still locked)
+    for path in glob.glob(os.path.join(pack_dir, "questions*.pack")):
+        if os.path.basename(path) != pack_name:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return reused, synthesized
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pre-render question bank audio into a packed file.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build")
+    b.add_argument("--questions", default="questions.json")
+    b.add_argument("--voices", default=DEFAULT_VOICE, help="comma-separated Google TTS voice names")
+    b.add_argument("--out", default=DEFAULT_DIR)
+    args = ap.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+    voices = [v.strip() for v in args.voices.split(",") if v.strip()]
+    reused, synthesized = build_pack(questions, voices, api_key=os.getenv("GOOGLE_API_KEY"), pack_dir=args.out)
+    print(f"Audio pack written to {args.out}: {reused} clips reused, {synthesized} synthesized.")
+
+
+if __name__ == "__main__":
+    main()
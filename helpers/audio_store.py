@@ -0,0 +1,184 @@
+# helpers/audio_store.py
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+
+# Answer recordings live on disk, one directory per session; session_state only keeps
+# the string handle returned by put(). Files are written once and read back lazily
+# (memory-mapped when stored uncompressed).
+STORE_DIR = os.getenv("AUDIO_STORE_DIR", os.path.join(tempfile.gettempdir(), "crackgpt_answers"))
+MAX_BYTES = int(os.getenv("AUDIO_STORE_MB", "1024")) * 1024 * 1024
+COMPRESS = os.getenv("AUDIO_STORE_COMPRESS", "0") == "1"
+STALE_SECONDS = 24 * 3600
+
+RAW_EXT = ".raw"
+ZLIB_EXT = ".z"
+
+
+class AudioStore:
+    def __init__(self, root=STORE_DIR, max_bytes=MAX_BYTES, compress=COMPRESS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._bytes = None  # computed lazily on first write
+        self._lock = threading.Lock()
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for session in os.listdir(self.root):
+            d = os.path.join(self.root, session)
+            if not os.path.isdir(d):
+                continue
+            for name in os.listdir(d):
+                if name.endswith((RAW_EXT, ZLIB_EXT)):
+                    p = os.path.join(d, name)
+                    try:
+                        st = os.stat(p)
+                        entries.append((st.st_mtime, st.st_size, p))
+                    except OSError:
+                        pass
+        return entries
+
+    def _path(self, handle):
+        session, _, name = handle.partition("/")
+        if not session or not name or any(c in handle for c in ("\\", "..")) or "/" in name:
+            raise ValueError(f"Invalid audio handle: {handle!r}")
+        return os.path.join(self.root, session, name)
+
+    def put(self, session_id, data):
+        """Stores one recording and returns its handle ("<session>/<file>"), or None if it couldn't be written."""
+        if not data:
+            return None
+        payload, ext = bytes(data), RAW_EXT
+        if self.compress:
+            packed = zlib.compress(payload, 1)
+            # Already-compressed formats (webm/opus, mp3) barely shrink; keep those raw so they stay mmap-able
+            if len(packed) < len(payload) * 0.9:
+                payload, ext = packed, ZLIB_EXT
+        if len(payload) > self.max_bytes:
+            return None
+        handle = f"{session_id}/{uuid.uuid4().hex}{ext}"
+        path = self._path(handle)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Audio store write failed: {e}")
+            return None
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._bytes += len(payload)
+            if self._bytes > self.max_bytes:
+                self._evict()
+        return handle
+
+    def _evict(self):
+        # Oldest recordings first, down to 90% of the budget
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._bytes = total
+
+    @contextmanager
+    def view(self, handle):
+        """
+        Yields a read-only buffer over the recording (a memoryview of an mmap for raw
+        files, decompressed bytes otherwise), or None if it is gone (evicted / cleaned up).
+        """
+        if not handle:
+            yield None
+            return
+        path = self._path(handle)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            yield None
+            return
+        with f:
+            if path.endswith(ZLIB_EXT):
+                yield zlib.decompress(f.read())
+                return
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            mv = memoryview(mm)
+            try:
+                yield mv
+            finally:
+                mv.release()
+                mm.close()
+
+    def read(self, handle):
+        """The recording as bytes (e.g. for st.audio), or None."""
+        with self.view(handle) as buf:
+            return None if buf is None else bytes(buf)
+
+    def size(self, handle):
+        try:
+            return os.path.getsize(self._path(handle))
+        except (OSError, ValueError):
+            return None
+
+    def drop_session(self, session_id):
+        """Deletes every recording of a session."""
+        if not session_id:
+            return
+        d = os.path.join(self.root, session_id)
+        if os.path.isdir(d):
+            shutil.rmtree(d, ignore_errors=True)
+            with self._lock:
+                self._bytes = None
+
+    def purge_stale(self, max_age=STALE_SECONDS):
+        """Removes session directories untouched for `max_age` seconds (left behind by crashed/abandoned sessions)."""
+        if not os.path.isdir(self.root):
+            return 0
+        cutoff = time.time() - max_age
+        removed = 0
+        for session in os.listdir(self.root):
+            d = os.path.join(self.root, session)
+            try:
+                if os.path.isdir(d) and os.path.getmtime(d) < cutoff:
+                    shutil.rmtree(d, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                pass
+        if removed:
+            with self._lock:
+                self._bytes = None
+        return removed
+
+
+_DEFAULT_STORE = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_store():
+    """Process-wide store instance."""
+    global _DEFAULT_STORE
+    with _DEFAULT_LOCK:
+        if _DEFAULT_STORE is None:
+            _DEFAULT_STORE = AudioStore()
+        return _DEFAULT_STORE
@@ -0,0 +1,256 @@
+# helpers/batch_grade.py
+"""
+Offline re-grading of recorded answers.
+
+    python -m helpers.batch_grade --dir recordings/ --out graded/
+    python -m helpers.batch_grade --manifest answers.jsonl --out graded/ --workers 4
+
+Input is either a manifest (.jsonl / .json list / .csv) of rows with "question" and "audio"
+(optional "id", "interview", "type"), or a directory where every audio file has a sibling
+<name>.txt holding its question; sub-directories become separate interviews.
+
+Audio is transcribed in a process pool (one warm Whisper model per worker, cpu_threads pinned
+so workers don't oversubscribe the host) and graded through ai_helpers with bounded
+concurrency. Each finished answer is appended to <out>/results.jsonl right away, so an
+interrupted run picks up where it stopped; <out>/reports/<interview>.pdf is written at the end.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from . import ai_helpers, pdf_helper, transcribe
+
+AUDIO_EXTS = (".wav", ".mp3", ".m4a", ".ogg", ".webm", ".flac")
+RESULTS_FILE = "results.jsonl"
+
+_worker = {}  # per-process: model, hf_token
+
+
+# --- input ---
+def load_manifest(path):
+    base = os.path.dirname(os.path.abspath(path))
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    elif path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+    items, seen = [], {}
+    for n, row in enumerate(rows):
+        if not row.get("question") or not row.get("audio"):
+            raise ValueError(f"{path}: row {n} needs 'question' and 'audio'")
+        item_id = str(row.get("id") or row["audio"])
+        if item_id in seen:
+            raise ValueError(f"{path}: row {n} repeats id {item_id!r} from row {seen[item_id]}")
+        seen[item_id] = n
+        audio = row["audio"] if os.path.isabs(row["audio"]) else os.path.join(base, row["audio"])
+        items.append({
+            "id": item_id,
+            "interview": row.get("interview") or "batch",
+            "question": row["question"],
+            "type": row.get("type") or "general",
+            "audio": audio,
+        })
+    return items
+
+
+def scan_directory(root):
+    items = []
+    for dirpath, _, files in sorted(os.walk(root)):
+        for name in sorted(files):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in AUDIO_EXTS:
+                continue
+            question_path = os.path.join(dirpath, stem + ".txt")
+            if not os.path.exists(question_path):
+                print(f"Skipping {name}: no {stem}.txt with its question")
+                continue
+            with open(question_path, encoding="utf-8") as f:
+                question = f.read().strip()
+            rel = os.path.relpath(os.path.join(dirpath, name), root)
+            interview = os.path.relpath(dirpath, root)
+            items.append({
+                "id": rel.replace(os.sep, "/"),
+                "interview": "batch" if interview == "." else interview.replace(os.sep, "/"),
+                "question": question,
+                "type": "general",
+                "audio": os.path.join(dirpath, name),
+            })
+    return items
+
+
+# --- checkpoint ---
+def load_checkpoint(out_dir):
+    """Results of earlier runs by id; answers that failed are left out so they're retried."""
+    done = {}
+    path = os.path.join(out_dir, RESULTS_FILE)
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if rec.get("error") or (rec.get("feedback") or {}).get("error"):
+                done.pop(rec.get("id"), None)
+            else:
+                done[rec["id"]] = rec
+    return done
+
+
+# --- transcription (worker processes) ---
+def _init_worker(hf_token, model_size, compute_type, cpu_threads):
+    _worker["hf_token"] = hf_token
+    try:
+        _worker["model"] = transcribe.get_whisper_model(hf_token, model_size, compute_type, cpu_threads)
+    except Exception as e:
+        _worker["model"] = None
+        _worker["error"] = f"Model load error: {e}"
+
+
+def _transcribe_item(item):
+    if _worker.get("model") is None:
+        return item["id"], None, 0, _worker.get("error", "Whisper model unavailable"), {}
+    try:
+        with open(item["audio"], "rb") as f:
+            raw = f.read()
+        audio = transcribe.decode_audio_bytes(raw)
+    except Exception as e:
+        return item["id"], None, 0, f"Audio decode error: {e}", {}
+    text, count, err, stats = transcribe.transcribe_file(audio, _worker["hf_token"], with_stats=True,
+                                                         model=_worker["model"])
+    return item["id"], text, count, err, stats
+
+
+# --- grading ---
+def _error_record(item, err):
+    return {"id": item["id"], "interview": item["interview"], "question": item["question"],
+            "type": item["type"], "audio": item["audio"], "error": err}
+
+
+def _grade(gemini_key, item, text, count, stats):
+    rec = {"id": item["id"], "interview": item["interview"], "question": item["question"], "type": item["type"],
+           "audio": item["audio"], "transcription": text, "filler_count": count, "speech_stats": stats}
+    try:
+        rec["feedback"], _ = ai_helpers.evaluate_answer(gemini_key, item["question"], text, count, stats)
+    except Exception as e:
+        rec["error"] = f"Failed to generate feedback: {e}"
+    return rec
+
+
+def run(items, out_dir, gemini_key, hf_token=None, workers=None, cpu_threads=None, grade_concurrency=4,
+        model_size=transcribe.DEFAULT_MODEL_SIZE, compute_type=transcribe.DEFAULT_COMPUTE_TYPE):
+    """Transcribes and grades every item not already in the checkpoint. Returns (graded, failed, skipped)."""
+    os.makedirs(out_dir, exist_ok=True)
+    done = load_checkpoint(out_dir)
+    todo = [it for it in items if it["id"] not in done]
+    skipped = len(items) - len(todo)
+    if not todo:
+        return 0, 0, skipped
+
+    cores = os.cpu_count() or 1
+    workers = workers or max(1, min(len(todo), cores))
+    cpu_threads = cpu_threads or max(1, cores // workers)
+    graded = failed = 0
+    write_lock = threading.Lock()
+
+    with open(os.path.join(out_dir, RESULTS_FILE), "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(hf_token, model_size, compute_type, cpu_threads)) as procs, \
+            ThreadPoolExecutor(max_workers=grade_concurrency, thread_name_prefix="batch-grade") as graders:
+
+        def record(fut):
+            nonlocal graded, failed
+            rec = fut.result()
+            ok = not rec.get("error") and not (rec.get("feedback") or {}).get("error")
+            with write_lock:
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                out.flush()  # every line is a checkpoint
+                if ok: graded += 1
+                else: failed += 1
+                print(f"[{graded + failed}/{len(todo)}] {rec['id']}: {'ok' if ok else rec.get('error') or rec['feedback'].get('error')}")
+
+        # Transcripts are handed to the graders as they finish, in whatever order workers complete
+        futures = {procs.submit(_transcribe_item, it): it for it in todo}
+        for fut in as_completed(futures):
+            item = futures[fut]
+            try:
+                _, text, count, err, stats = fut.result()
+            except Exception as e:  # worker crashed (e.g. BrokenProcessPool); recorded so a re-run retries it
+                text, count, err, stats = None, 0, f"Transcription worker failed: {e}", {}
+            if err:
+                rec = _error_record(item, err)
+                graders.submit(lambda r=rec: r).add_done_callback(record)
+            else:
+                graders.submit(_grade, gemini_key, item, text, count, stats).add_done_callback(record)
+    return graded, failed, skipped
+
+
+def write_reports(items, out_dir):
+    """One PDF per interview from everything in the checkpoint, in input order. Returns the paths."""
+    done = load_checkpoint(out_dir)
+    interviews = {}
+    for it in items:
+        rec = done.get(it["id"])
+        if rec is None:
+            continue
+        interviews.setdefault(it["interview"], []).append({
+            "question": {"question": rec["question"], "type": rec.get("type")},
+            "transcription": rec.get("transcription"),
+            "filler_count": rec.get("filler_count"),
+            "feedback_parsed": rec.get("feedback"),
+        })
+    report_dir = os.path.join(out_dir, "reports")
+    os.makedirs(report_dir, exist_ok=True)
+    paths = []
+    for interview, answers in interviews.items():
+        name = re.sub(r"[^A-Za-z0-9._-]+", "_", interview).strip("_") or "batch"
+        path = os.path.join(report_dir, f"{name}.pdf")
+        with open(path, "wb") as f:
+            f.write(pdf_helper.create_pdf_report({"job_details": {"title": interview, "difficulty": "N/A"},
+                                                  "answers": answers}))
+        paths.append(path)
+    return paths
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Transcribe and grade recorded interview answers offline.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--dir", help="directory of audio files, each with a <name>.txt question")
+    src.add_argument("--manifest", help=".jsonl / .json / .csv with question and audio columns")
+    ap.add_argument("--out", required=True, help="output directory (results.jsonl, reports/)")
+    ap.add_argument("--workers", type=int, default=0, help="transcription processes (default: one per core)")
+    ap.add_argument("--cpu-threads", type=int, default=0, help="Whisper threads per worker (default: cores / workers)")
+    ap.add_argument("--grade-concurrency", type=int, default=4, help="Gemini requests in flight")
+    ap.add_argument("--model", default=transcribe.DEFAULT_MODEL_SIZE)
+    ap.add_argument("--compute-type", default=transcribe.DEFAULT_COMPUTE_TYPE)
+    ap.add_argument("--no-pdf", action="store_true")
+    args = ap.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    gemini_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_key:
+        ap.error("GEMINI_API_KEY is not set")
+
+    items = scan_directory(args.dir) if args.dir else load_manifest(args.manifest)
+    graded, failed, skipped = run(items, args.out, gemini_key, hf_token=os.getenv("HF_TOKEN"),
+                                  workers=args.workers, cpu_threads=args.cpu_threads,
+                                  grade_concurrency=args.grade_concurrency,
+                                  model_size=args.model, compute_type=args.compute_type)
+    print(f"{graded} graded, {failed} failed, {skipped} already done (results in {args.out}/{RESULTS_FILE}).")
+    if not args.no_pdf:
+        for path in write_reports(items, args.out):
+            print(f"Report written to {path}")
+
+
+if __name__ == "__main__":
+    main()
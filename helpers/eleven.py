@@ -1,30 +1,63 @@
 # helpers/eleven.py
-import requests
+import hashlib
+import os
+import threading
+import time
+
+from . import http_client, metrics
+from .tts_cache import get_cache
+
+# Overridable so benchmarks can point at a local stand-in
+API_BASE = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io")
+
+# Voice lists barely change, so keep them for a while per API key
+VOICES_TTL_SECONDS = 600
+_voices_cache = {}  # sha256(api_key) -> (expires_at, voices)
+_voices_lock = threading.Lock()
 
 def fetch_elevenlabs_voices(api_key):
+    cache_key = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+    with _voices_lock:
+        hit = _voices_cache.get(cache_key)
+        if hit and hit[0] > time.monotonic():
+            return hit[1]
     try:
-        url = "https://api.elevenlabs.io/v1/voices"
+        url = f"{API_BASE}/v1/voices"
         headers = {"xi-api-key": api_key}
-        resp = requests.get(url, headers=headers, timeout=15)
+        resp = http_client.get(url, "eleven_voices", headers=headers)
         if resp.status_code == 200:
             data = resp.json()
-            if isinstance(data, dict):
-                return data.get("voices", []) or []
-            return []
+            voices = (data.get("voices", []) or []) if isinstance(data, dict) else []
+            with _voices_lock:
+                _voices_cache[cache_key] = (time.monotonic() + VOICES_TTL_SECONDS, voices)
+            return voices
         else:
             return []
     except Exception:
         return []
 
-def tts_audio_bytes(api_key, voice_id, text):
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+def tts_audio_bytes(api_key, voice_id, text, use_cache=True):
+    if use_cache:
+        with metrics.span("tts", provider="elevenlabs") as sp:
+            audio, sp["cached"] = get_cache().fetch(
+                "elevenlabs", voice_id, text, {"model": "eleven_monolingual_v1", "accept": "audio/wav"},
+                lambda: _synthesize(api_key, voice_id, text))
+            sp["payload_bytes"] = len(audio)
+            return audio
+    with metrics.span("tts", provider="elevenlabs", cached=False) as sp:
+        audio = _synthesize(api_key, voice_id, text)
+        sp["payload_bytes"] = len(audio)
+        return audio
+
+def _synthesize(api_key, voice_id, text):
+    url = f"{API_BASE}/v1/text-to-speech/{voice_id}"
     headers = {
         "Accept": "audio/wav",
         "Content-Type": "application/json",
         "xi-api-key": api_key
     }
     payload = {"text": text, "model": "eleven_monolingual_v1"}
-    resp = requests.post(url, json=payload, headers=headers, timeout=30)
+    resp = http_client.post(url, "eleven_tts", json=payload, headers=headers)
     if resp.status_code == 200:
         return resp.content
     else:
@@ -0,0 +1,103 @@
+# helpers/eval_queue.py
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
+import threading
+
+from . import ai_helpers, metrics
+
+
+class EvaluationQueue:
+    """
+    Per-session background grader. Each answer is submitted as soon as it is recorded,
+    so by the time the interview ends most of the feedback is already done.
+    Worker threads never touch st.session_state; results are read back through the futures.
+    """
+
+    def __init__(self, gemini_key, max_workers=2, session_id=None):
+        self.gemini_key = gemini_key
+        self.session_id = session_id
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="eval")
+        self._futures = {}  # answer index -> (Future, position in batch or None)
+        self._lock = threading.Lock()
+
+    def _evaluate(self, question, transcription, filler_count, speech_stats=None):
+        metrics.set_session(self.session_id)
+        try:
+            parsed, _ = ai_helpers.evaluate_answer(
+                gemini_key=self.gemini_key, question=question,
+                transcription=transcription, filler_count=filler_count, speech_stats=speech_stats)
+            return parsed
+        except Exception as e:
+            return {"error": f"Failed to generate feedback: {e}"}
+
+    def _evaluate_batch(self, items):
+        metrics.set_session(self.session_id)
+        try:
+            results, _ = ai_helpers.evaluate_answers_batch(self.gemini_key, items)
+            return results
+        except Exception as e:
+            return [{"error": f"Failed to generate feedback: {e}"} for _ in items]
+
+    def submit(self, index, question, transcription, filler_count, speech_stats=None):
+        """Queues grading for answer `index`. Re-submitting an index is a no-op."""
+        with self._lock:
+            if index in self._futures:
+                return self._futures[index][0]
+            fut = self._executor.submit(self._evaluate, question, transcription, filler_count, speech_stats)
+            self._futures[index] = (fut, None)
+            return fut
+
+    def submit_batch(self, indexed_items, batch_size=5):
+        """
+        Queues grading of several answers through the batched grader, `batch_size` per request.
+        `indexed_items` is a list of (index, question, transcription, filler_count[, speech_stats]).
+        """
+        with self._lock:
+            todo = [it for it in indexed_items if it[0] not in self._futures]
+            for start in range(0, len(todo), batch_size):
+                chunk = todo[start:start + batch_size]
+                items = [{"question": it[1], "transcription": it[2], "filler_count": it[3],
+                          "speech_stats": it[4] if len(it) > 4 else None} for it in chunk]
+                fut = self._executor.submit(self._evaluate_batch, items)
+                for pos, it in enumerate(chunk):
+                    index = it[0]
+                    self._futures[index] = (fut, pos)
+
+    def has(self, index):
+        with self._lock:
+            return index in self._futures
+
+    def in_flight(self):
+        """Number of answers still being graded."""
+        with self._lock:
+            return sum(1 for f, _ in self._futures.values() if not f.done())
+
+    def results(self, timeout=None):
+        """
+        Yields (index, parsed_feedback) as grading finishes, waiting at most `timeout`
+        seconds overall for whatever is still in flight.
+        """
+        with self._lock:
+            by_future = {}
+            for i, (f, pos) in self._futures.items():
+                by_future.setdefault(f, []).append((i, pos))
+        try:
+            for fut in as_completed(by_future, timeout=timeout):
+                result = fut.result()
+                for i, pos in by_future[fut]:
+                    yield i, result if pos is None else result[pos]
+        except FuturesTimeout:
+            return
+
+    def wait_all(self, timeout=None):
+        with self._lock:
+            futures = {f for f, _ in self._futures.values()}
+        wait(futures, timeout=timeout)
+
+    def shutdown(self):
+        """Drops queued work and releases the worker threads."""
+        with self._lock:
+            for f, _ in self._futures.values():
+                f.cancel()
+            self._futures.clear()
+        self._executor.shutdown(wait=False)
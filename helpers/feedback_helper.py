@@ -1,16 +1,20 @@
 # helpers/feedback_helper.py
+from .posture_store import PostureStore
 
 def generate_posture_feedback(posture_data):
     """
-    Analyzes a list of posture data points and returns a dictionary of feedback.
+    Analyzes posture data (a PostureStore, or a list of data points) and returns a dictionary of feedback.
     """
     if not posture_data:
         return None
+    if not isinstance(posture_data, PostureStore):
+        posture_data = PostureStore.from_records(posture_data)
 
-    # Calculate average metrics from the recorded data
-    num_frames = len(posture_data)
-    avg_score = sum(d["posture_score"] for d in posture_data if d.get("posture_score")) / num_frames
-    avg_abs_tilt = sum(abs(d["head_tilt_deg"]) for d in posture_data if d.get("head_tilt_deg")) / num_frames
+    # Averages come from the store's running aggregates, over valid samples only
+    avg_score = posture_data.mean("posture_score")
+    if avg_score is None:
+        return None
+    avg_abs_tilt = posture_data.mean_abs_tilt() or 0.0
 
     feedback = {
         "summary": "",
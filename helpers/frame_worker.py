@@ -0,0 +1,110 @@
+# helpers/frame_worker.py
+import threading
+import time
+
+from . import metrics
+
+
+class FrameAnalysisWorker:
+    """
+    Runs frame analysis on its own thread so the WebRTC recv callback never waits on inference.
+
+    - submit() is non-blocking: it only drops the frame into a single "latest frame" slot.
+      If the worker hasn't picked up the previous frame yet, that one is overwritten (dropped).
+    - Frames are sampled toward `target_fps`; if analysis is slower than that, the sampling
+      interval backs off to the measured analysis time so CPU use stays bounded per session.
+    - `on_stop` runs on the worker thread after its last analysis, so resources analyze_fn
+      uses (MediaPipe graphs) are released only once nothing can call into them any more.
+    """
+
+    def __init__(self, analyze_fn, target_fps=4.0, max_results=10000, on_stop=None):
+        self.analyze_fn = analyze_fn
+        self.on_stop = on_stop
+        self.min_interval = 1.0 / target_fps if target_fps > 0 else 0.0
+        self.max_results = max_results
+        self._interval = self.min_interval
+        self._avg_cost = 0.0  # EWMA of analysis time, seconds
+        self._last_accepted = 0.0
+        self._slot = None
+        self._cond = threading.Condition()
+        self._results = []
+        self._stopped = False
+        self.stats = {"submitted": 0, "sampled_out": 0, "dropped": 0, "processed": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name="frame-analysis", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame):
+        """Offers a frame for analysis. Returns immediately."""
+        now = time.monotonic()
+        with self._cond:
+            self.stats["submitted"] += 1
+            if now - self._last_accepted < self._interval:
+                self.stats["sampled_out"] += 1
+                return
+            if self._slot is not None:
+                self.stats["dropped"] += 1
+            self._slot = frame
+            self._last_accepted = now
+            self._cond.notify()
+
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            if self.on_stop is not None:
+                try:
+                    self.on_stop()
+                except Exception as e:
+                    print(f"Error releasing frame analysis resources: {e}")
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._slot is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                frame, self._slot = self._slot, None
+
+            t0 = time.perf_counter()
+            try:
+                data = self.analyze_fn(frame)
+            except Exception as e:
+                print(f"Error analyzing frame: {e}")
+                data = None
+            cost = time.perf_counter() - t0
+            metrics.observe("frame_analysis", cost)
+
+            with self._cond:
+                self._avg_cost = cost if not self._avg_cost else 0.8 * self._avg_cost + 0.2 * cost
+                # Never sample faster than we can analyze
+                self._interval = max(self.min_interval, self._avg_cost * 1.1)
+                if data and not data.get("error"):
+                    data.setdefault("t", time.time())
+                    self.stats["processed"] += 1
+                    if len(self._results) < self.max_results:
+                        self._results.append(data)
+                else:
+                    self.stats["errors"] += 1
+
+    def drain(self):
+        """Returns and clears the results collected so far."""
+        with self._cond:
+            out, self._results = self._results, []
+            return out
+
+    def snapshot(self):
+        """Counters plus the current effective analysis rate."""
+        with self._cond:
+            snap = dict(self.stats)
+            snap["analysis_fps"] = round(1.0 / self._interval, 2) if self._interval else None
+            snap["avg_analysis_ms"] = round(self._avg_cost * 1000, 1)
+            return snap
+
+    def stop(self, timeout=5.0):
+        """Stops the thread and waits (up to `timeout`) for the analysis in progress and on_stop."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
@@ -1,19 +1,25 @@
 # helpers/google_tts.py
-import requests
 import os
 import base64
 
-def tts_audio_bytes(text, api_key=None, voice_name="en-US-Wavenet-D", ssml=False):
+from . import http_client, metrics
+from .tts_cache import get_cache
+
+# Overridable so benchmarks can point at a local stand-in
+API_BASE = os.getenv("GOOGLE_TTS_BASE_URL", "https://texttospeech.googleapis.com")
+
+def tts_audio_bytes(text, api_key=None, voice_name="en-US-Wavenet-D", ssml=False, use_cache=True):
     """
     Generate high-quality speech audio using Google Cloud TTS (WaveNet).
     Adds natural pacing, tone, and device profile for smoother sound.
+    Results are cached by (voice, text, audio config), so reruns don't re-synthesize.
     """
     if api_key is None:
         api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("Google API key not found. Please set GOOGLE_API_KEY in .env")
 
-    url = f"https://texttospeech.googleapis.com/v1/text:synthesize?key={api_key}"
+    url = f"{API_BASE}/v1/text:synthesize?key={api_key}"
 
     # --- Fine-tuning parameters for more natural sound ---
     data = {
@@ -31,10 +37,20 @@ def tts_audio_bytes(text, api_key=None, voice_name="en-US-Wavenet-D", ssml=False
         }
     }
 
-    response = requests.post(url, json=data)
-    result = response.json()
+    def _synthesize():
+        response = http_client.post(url, "google_tts", json=data)
+        result = response.json()
+
+        if "audioContent" in result:
+            return base64.b64decode(result["audioContent"])
+        else:
+            raise Exception(result.get("error", "Unknown error"))
 
-    if "audioContent" in result:
-        return base64.b64decode(result["audioContent"])
-    else:
-        raise Exception(result.get("error", "Unknown error"))
+    with metrics.span("tts", provider="google") as sp:
+        if not use_cache:
+            audio, sp["cached"] = _synthesize(), False
+        else:
+            audio, sp["cached"] = get_cache().fetch(
+                "google", voice_name, text, {"ssml": ssml, "voice": data["voice"], "audioConfig": data["audioConfig"]}, _synthesize)
+        sp["payload_bytes"] = len(audio)
+        return audio
@@ -0,0 +1,154 @@
+# helpers/http_client.py
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+
+# One pooled session for every external API call, so keep-alive connections
+# (and their TLS handshakes) are reused across requests and sessions.
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 32
+
+# (connect, read) timeouts per endpoint, in seconds
+ENDPOINT_TIMEOUTS = {
+    "google_tts": (3.05, 15),
+    "eleven_tts": (3.05, 30),
+    "eleven_voices": (3.05, 10),
+}
+DEFAULT_TIMEOUT = (3.05, 20)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when an endpoint has failed too often recently and calls are short-circuited."""
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures.
+    While open, calls fail fast; after `reset_timeout` one trial call is let through (half-open).
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self._opened_at >= self.reset_timeout else "open"
+
+
+_session = None
+_session_lock = threading.Lock()
+_breakers = {}
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            # Retries are handled below so they can share the jitter and circuit breaker logic
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
+
+def get_breaker(endpoint):
+    with _session_lock:
+        if endpoint not in _breakers:
+            _breakers[endpoint] = CircuitBreaker()
+        return _breakers[endpoint]
+
+
+def _backoff(attempt, base=0.5, cap=8.0):
+    # "Full jitter": sleep a random amount up to the exponential bound
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def request(method, url, endpoint, retries=2, timeout=None, **kwargs):
+    """
+    Sends a request through the shared pool with a per-endpoint timeout, up to `retries`
+    retries (connection errors, timeouts, 429 and 5xx) and a per-endpoint circuit breaker.
+    Returns the final requests.Response; raises CircuitOpenError or the last network error.
+    """
+    breaker = get_breaker(endpoint)
+    if not breaker.allow():
+        raise CircuitOpenError(f"{endpoint} is temporarily unavailable (too many recent failures)")
+
+    timeout = timeout or ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+    session = get_session()
+    try:
+        for attempt in range(retries + 1):
+            try:
+                resp = session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    raise
+                metrics.inc("http_retries_total", endpoint=endpoint)
+                time.sleep(_backoff(attempt))
+                continue
+
+            if resp.status_code in RETRY_STATUSES and attempt < retries:
+                retry_after = resp.headers.get("Retry-After")
+                try: delay = min(float(retry_after), 30.0)
+                except (TypeError, ValueError): delay = _backoff(attempt)
+                metrics.inc("http_retries_total", endpoint=endpoint)
+                time.sleep(delay)
+                continue
+
+            metrics.inc("http_requests_total", endpoint=endpoint, status=resp.status_code)
+            if resp.status_code in RETRY_STATUSES:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            return resp
+    except BaseException:
+        # Any other way out (ChunkedEncodingError, InvalidURL, ...) still settles the breaker,
+        # otherwise a half-open trial would stay "in flight" forever
+        breaker.record_failure()
+        raise
+
+
+def get(url, endpoint, **kwargs):
+    return request("GET", url, endpoint, **kwargs)
+
+
+def post(url, endpoint, **kwargs):
+    return request("POST", url, endpoint, **kwargs)
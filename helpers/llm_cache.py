@@ -0,0 +1,147 @@
+# helpers/llm_cache.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Disk-backed LRU for Gemini responses, shared by every session/process on the host.
+# SQLite keeps it a single file with safe concurrent access.
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "crackgpt_llm.sqlite"))
+MAX_BYTES = int(os.getenv("LLM_CACHE_MB", "64")) * 1024 * 1024
+DEFAULT_TTL = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+_WS = re.compile(r"\s+")
+
+
+def normalize(value):
+    """Collapses whitespace in strings (recursively) so trivially different pastes share a key."""
+    if isinstance(value, str):
+        return _WS.sub(" ", value).strip()
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items()}
+    return value
+
+
+def make_key(namespace, model, **inputs):
+    """
+    Exact-match key over the namespace, model and inputs. Only whitespace is normalized,
+    so rewording, case or punctuation changes are misses.
+    """
+    raw = json.dumps([namespace, model, normalize(inputs)], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES, default_ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,
+                expires REAL NOT NULL, accessed REAL NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_expires ON entries(expires)")
+            # Running total of entry sizes, kept in step by triggers so every process sees it
+            conn.execute("CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO usage SELECT 0, COALESCE(SUM(size), 0) FROM entries")
+            conn.execute("""CREATE TRIGGER IF NOT EXISTS entries_ins AFTER INSERT ON entries
+                BEGIN UPDATE usage SET total = total + NEW.size; END""")
+            conn.execute("""CREATE TRIGGER IF NOT EXISTS entries_del AFTER DELETE ON entries
+                BEGIN UPDATE usage SET total = total - OLD.size; END""")
+            conn.execute("""CREATE TRIGGER IF NOT EXISTS entries_upd AFTER UPDATE OF size ON entries
+                BEGIN UPDATE usage SET total = total - OLD.size + NEW.size; END""")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Cached JSON value, or None if missing/expired."""
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                with conn:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            with conn:
+                conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            print(f"LLM cache read failed: {e}")
+            return None
+
+    def put(self, key, value, ttl=None):
+        data = json.dumps(value, ensure_ascii=False)
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        expires = now + (self.default_ttl if ttl is None else ttl)
+        try:
+            with self._write_lock:
+                conn = self._conn()
+                with conn:
+                    # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete doesn't fire triggers
+                    conn.execute("""INSERT INTO entries VALUES (?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET
+                        value = excluded.value, size = excluded.size, expires = excluded.expires,
+                        accessed = excluded.accessed""", (key, data, len(data), expires, now))
+                    self._evict(conn, now)
+        except sqlite3.Error as e:
+            print(f"LLM cache write failed: {e}")
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM entries WHERE expires < ?", (now,))
+        total = self._total(conn)
+        if total <= self.max_bytes:
+            return
+        # Least recently used first, down to 90% of the budget
+        target = int(self.max_bytes * 0.9)
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+    @staticmethod
+    def _total(conn):
+        return conn.execute("SELECT total FROM usage").fetchone()[0]
+
+    def clear(self):
+        with self._write_lock, self._conn() as conn:
+            conn.execute("DELETE FROM entries")
+
+
+_DEFAULT = None
+_DISABLED = object()  # the open failed; don't retry (and re-report) on every call
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache instance, or None if the cache file can't be opened."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            try:
+                _DEFAULT = LLMCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"LLM cache disabled: {e}")
+                _DEFAULT = _DISABLED
+        return None if _DEFAULT is _DISABLED else _DEFAULT
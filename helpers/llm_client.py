@@ -0,0 +1,216 @@
+# helpers/llm_client.py
+import hashlib
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+
+import google.generativeai as genai
+
+from . import metrics
+
+# Shared Gemini access for every session in the process. One LLMClient per API key holds
+# reusable model handles and a scheduler that combines
+# - a token bucket (GEMINI_RPM requests/minute, global to the key)
+# - AIMD concurrency: +1/limit per success, halved on 429 (between 1 and GEMINI_MAX_CONCURRENCY)
+# - a priority queue, so interactive calls (follow-ups, setup) go ahead of bulk grading
+
+INTERACTIVE = 0
+BULK = 10
+
+RPM = float(os.getenv("GEMINI_RPM", "60"))
+MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+INITIAL_CONCURRENCY = int(os.getenv("GEMINI_INITIAL_CONCURRENCY", "4"))
+MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+
+_THROTTLE_NAMES = ("ResourceExhausted", "TooManyRequests")
+_TRANSIENT_NAMES = ("ServiceUnavailable", "DeadlineExceeded", "InternalServerError")
+_GRPC_STATUSES = {"RESOURCE_EXHAUSTED": 429, "INTERNAL": 500, "UNAVAILABLE": 503, "DEADLINE_EXCEEDED": 504}
+
+
+def _status_code(exc):
+    # google.api_core errors carry an HTTP status in .code; raw gRPC errors have a .code() StatusCode;
+    # HTTP client errors use .status_code or .response.status_code
+    for owner, attr in ((exc, "code"), (exc, "status_code"), (getattr(exc, "response", None), "status_code")):
+        value = getattr(owner, attr, None)
+        if callable(value):
+            try:
+                value = value()
+            except Exception:
+                continue
+        if isinstance(value, int):
+            return int(value)
+        if getattr(value, "name", None) in _GRPC_STATUSES:
+            return _GRPC_STATUSES[value.name]
+    return None
+
+
+def _classify(exc):
+    name = type(exc).__name__
+    code = _status_code(exc)
+    if name in _THROTTLE_NAMES or code == 429:
+        return "throttled"
+    if name in _TRANSIENT_NAMES or code in (500, 502, 503, 504):
+        return "transient"
+    return "error"
+
+
+def _backoff(attempt, base=1.0, cap=20.0):
+    # Same full-jitter schedule as http_client, with a longer base for quota errors
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    def __init__(self, rate_per_s, burst):
+        self.rate = rate_per_s
+        self.capacity = burst
+        self.tokens = float(burst)
+        self._last = time.monotonic()
+
+    def try_take(self):
+        """Takes a token and returns 0, or returns the seconds until one is available. Caller holds the lock."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class Scheduler:
+    """Admits calls in priority order (then FIFO) when both a concurrency slot and a rate token are free."""
+
+    def __init__(self, rpm=None, max_concurrency=None, initial=None):
+        rpm = RPM if rpm is None else rpm
+        max_concurrency = MAX_CONCURRENCY if max_concurrency is None else max_concurrency
+        initial = INITIAL_CONCURRENCY if initial is None else initial
+        self.bucket = TokenBucket(rpm / 60.0, burst=max(1, int(max_concurrency)))
+        self.max_limit = max(1, max_concurrency)
+        self.limit = float(min(max(1, initial), self.max_limit))
+        self.in_flight = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._last_decrease = 0.0
+
+    def acquire(self, priority=BULK):
+        with self._cond:
+            entry = [priority, next(self._seq)]
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if self._waiters[0] is entry and self.in_flight < int(self.limit):
+                        wait = self.bucket.try_take()
+                        if wait == 0:
+                            heapq.heappop(self._waiters)
+                            self.in_flight += 1
+                            self._cond.notify_all()
+                            return
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                self._cond.notify_all()
+                raise
+
+    def release(self, outcome):
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == "ok":
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            elif outcome == "throttled":
+                # At most one decrease per second so a burst of 429s from the same window counts once
+                now = time.monotonic()
+                if now - self._last_decrease >= 1.0:
+                    self.limit = max(1.0, self.limit / 2)
+                    self._last_decrease = now
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {"limit": round(self.limit, 2), "in_flight": self.in_flight, "queued": len(self._waiters)}
+
+
+_configure_lock = threading.Lock()
+
+
+class LLMClient:
+    def __init__(self, api_key, rpm=None, max_concurrency=None, initial=None):
+        self.api_key = api_key
+        self.scheduler = Scheduler(rpm, max_concurrency, initial)
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def model(self, name):
+        """Reusable GenerativeModel handle bound to this client's API key."""
+        with self._lock:
+            handle = self._models.get(name)
+            if handle is None:
+                with _configure_lock:
+                    genai.configure(api_key=self.api_key)
+                    handle = genai.GenerativeModel(name)
+                    # Bind the transport now so a later configure() for another key can't swap it
+                    if getattr(handle, "_client", "") is None:
+                        from google.generativeai import client as genai_client
+                        handle._client = genai_client.get_default_generative_client()
+                self._models[name] = handle
+            return handle
+
+    def generate(self, model_name, prompt, stage, priority=BULK, retries=None):
+        """
+        Runs one generate_content call through the scheduler, retrying 429 / 5xx with jittered
+        backoff. The metrics span covers queueing and retries; returns the response or raises the last error.
+        """
+        retries = MAX_RETRIES if retries is None else retries
+        model = self.model(model_name)
+        with metrics.span(stage, priority=priority) as sp:
+            queued = 0.0
+            for attempt in range(retries + 1):
+                t0 = time.perf_counter()
+                self.scheduler.acquire(priority)
+                queued += time.perf_counter() - t0
+                try:
+                    resp = model.generate_content(prompt)
+                except Exception as e:
+                    outcome = _classify(e)
+                    self.scheduler.release(outcome)
+                    metrics.inc("llm_requests_total", stage=stage, outcome=outcome)
+                    if outcome == "error" or attempt == retries:
+                        sp["attempts"] = attempt + 1
+                        sp["queue_ms"] = round(queued * 1000, 1)
+                        raise
+                    metrics.inc("llm_retries_total", stage=stage, reason=outcome)
+                    time.sleep(_backoff(attempt))
+                    continue
+                self.scheduler.release("ok")
+                metrics.inc("llm_requests_total", stage=stage, outcome="ok")
+                metrics.record_llm_usage(sp, resp)
+                sp["attempts"] = attempt + 1
+                sp["queue_ms"] = round(queued * 1000, 1)
+                return resp
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key):
+    """Process-wide client for `api_key` (keyed by its hash, so keys aren't kept as dict keys)."""
+    digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+    with _clients_lock:
+        client = _clients.get(digest)
+        if client is None:
+            client = _clients[digest] = LLMClient(api_key)
+        return client
+
+
+def reset_clients():
+    """Drops cached clients/model handles (e.g. after swapping the genai module in benchmarks)."""
+    with _clients_lock:
+        _clients.clear()
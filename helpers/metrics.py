@@ -0,0 +1,186 @@
+# helpers/metrics.py
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Lightweight tracing: every pipeline stage runs inside span(), which feeds
+# - process-wide Prometheus-style histograms/counters (render_prometheus / serve_metrics)
+# - a per-session JSON trace (session_trace / write_session_trace)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MAX_TRACE_EVENTS = 2000  # per session, oldest dropped first
+# Sessions with a trace held in memory; the least recently active one is dropped beyond this,
+# so sessions that never reach drop_session_trace() (abandoned tabs, no METRICS_DIR) stay bounded
+MAX_TRACE_SESSIONS = int(os.getenv("METRICS_MAX_TRACE_SESSIONS", "200"))
+
+_lock = threading.Lock()
+_histograms = {}  # stage -> {"buckets": [...], "sum": float, "count": int}
+_counters = {}    # (name, sorted label items) -> value
+_traces = OrderedDict()  # session_id -> list of span dicts, least recently active first
+
+current_session = contextvars.ContextVar("metrics_session", default=None)
+
+
+def set_session(session_id):
+    """Tags spans started on this thread/context with a session id."""
+    current_session.set(session_id)
+
+
+def inc(name, value=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(stage, seconds):
+    with _lock:
+        h = _histograms.get(stage)
+        if h is None:
+            h = _histograms[stage] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                h["buckets"][i] += 1
+        h["sum"] += seconds
+        h["count"] += 1
+
+
+@contextmanager
+def span(stage, session_id=None, trace=True, **attrs):
+    """
+    Times a stage. The yielded dict can be filled in while the stage runs, e.g.
+    span["payload_bytes"] = len(audio); payload_bytes, prompt_tokens and output_tokens
+    are also exported as counters.
+    """
+    info = dict(attrs)
+    start_wall = time.time()
+    t0 = time.perf_counter()
+    error = None
+    try:
+        yield info
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        duration = time.perf_counter() - t0
+        observe(stage, duration)
+        if error is not None or info.get("error"):
+            inc("stage_errors_total", stage=stage)
+        if info.get("payload_bytes"):
+            inc("stage_payload_bytes_total", info["payload_bytes"], stage=stage)
+        if info.get("prompt_tokens"):
+            inc("llm_tokens_total", info["prompt_tokens"], stage=stage, kind="prompt")
+        if info.get("output_tokens"):
+            inc("llm_tokens_total", info["output_tokens"], stage=stage, kind="output")
+        sid = session_id or current_session.get()
+        if trace and sid:
+            event = {"stage": stage, "start": round(start_wall, 3), "duration_ms": round(duration * 1000, 2)}
+            event.update(info)
+            if error is not None:
+                event["error"] = str(error)
+            with _lock:
+                events = _traces.get(sid)
+                if events is None:
+                    events = _traces[sid] = []
+                    while len(_traces) > MAX_TRACE_SESSIONS:
+                        _traces.popitem(last=False)
+                else:
+                    _traces.move_to_end(sid)
+                events.append(event)
+                if len(events) > MAX_TRACE_EVENTS:
+                    del events[: len(events) - MAX_TRACE_EVENTS]
+
+
+def record_llm_usage(span_info, response):
+    """Copies Gemini token counts (if the response has them) onto a span."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    span_info["prompt_tokens"] = getattr(usage, "prompt_token_count", 0) or 0
+    span_info["output_tokens"] = getattr(usage, "candidates_token_count", 0) or 0
+
+
+def _fmt_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in labels) + "}"
+
+
+def render_prometheus():
+    """All metrics in Prometheus text exposition format."""
+    lines = ["# TYPE crackgpt_stage_duration_seconds histogram"]
+    with _lock:
+        for stage, h in sorted(_histograms.items()):
+            for bound, n in zip(BUCKETS, h["buckets"]):
+                lines.append(f'crackgpt_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {n}')
+            lines.append(f'crackgpt_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {h["count"]}')
+            lines.append(f'crackgpt_stage_duration_seconds_sum{{stage="{stage}"}} {h["sum"]:.6f}')
+            lines.append(f'crackgpt_stage_duration_seconds_count{{stage="{stage}"}} {h["count"]}')
+        names = sorted({name for name, _ in _counters})
+        for name in names:
+            lines.append(f"# TYPE crackgpt_{name} counter")
+            for (n, labels), value in sorted(_counters.items()):
+                if n == name:
+                    lines.append(f"crackgpt_{name}{_fmt_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    """Writes the metrics to a file (e.g. for node_exporter's textfile collector)."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+
+
+def session_trace(session_id):
+    with _lock:
+        return list(_traces.get(session_id, []))
+
+
+def write_session_trace(session_id, directory, drop=True):
+    """Dumps a session's spans to <directory>/<session_id>.json. Returns the path or None."""
+    events = session_trace(session_id)
+    if not events:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{session_id}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"session_id": session_id, "spans": events}, f, indent=1)
+    if drop:
+        drop_session_trace(session_id)
+    return path
+
+
+def drop_session_trace(session_id):
+    """Forgets a finished session's spans without writing them anywhere."""
+    with _lock:
+        _traces.pop(session_id, None)
+
+
+def serve_metrics(port, host="0.0.0.0"):
+    """Starts a /metrics endpoint on a daemon thread. Returns the server."""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, int(port)), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
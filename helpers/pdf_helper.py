@@ -2,17 +2,167 @@
 from fpdf import FPDF
 import PyPDF2
 import io
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-def extract_text_from_pdf(pdf_file):
-    # (No changes)
+from . import metrics
+
+# Parsed resumes keyed by (sha256 of the PDF bytes, char budget, page budget),
+# so re-submitting the job form doesn't re-parse the same file
+_TEXT_CACHE = OrderedDict()
+_TEXT_CACHE_MAX = 64
+_cache_lock = threading.Lock()
+
+# Finished reports keyed by a hash of what they print, so reruns and repeated downloads of
+# an unchanged interview don't lay the document out again
+_REPORTS = OrderedDict()
+_REPORTS_MAX = 16
+REPORT_FIELDS = ("question", "transcription", "filler_count", "feedback_parsed")
+
+PARALLEL_MIN_PAGES = 24   # below this a worker pool costs more than it saves
+PAGES_PER_CHUNK = 8
+_pool = None
+_pool_lock = threading.Lock()
+_background = None  # thread that parses uploads while the user is still filling in the form
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+
+def _extract_page_range(pdf_bytes, start, stop):
+    # Runs in a worker process; each worker parses its own reader over the shared bytes
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _iter_pages_parallel(pdf_bytes, num_pages, workers):
+    # Chunks are submitted in small waves and consumed in order, so a budget that is
+    # reached early leaves the remaining chunks unsubmitted (or cancelled)
+    pool = _get_pool(workers)
+    chunks = [(i, min(i + PAGES_PER_CHUNK, num_pages)) for i in range(0, num_pages, PAGES_PER_CHUNK)]
+    pending = []
+    next_chunk = 0
+    try:
+        while next_chunk < len(chunks) or pending:
+            while next_chunk < len(chunks) and len(pending) < workers:
+                start, stop = chunks[next_chunk]
+                pending.append(pool.submit(_extract_page_range, pdf_bytes, start, stop))
+                next_chunk += 1
+            for page_text in pending.pop(0).result():
+                yield page_text
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+
+def extract_text_from_pdf(pdf_file, max_chars=None, max_pages=None, workers=None, use_cache=True):
+    """Returns (text, error_message); see extract_pdf_text for the arguments."""
+    text, err, _ = extract_pdf_text(pdf_file, max_chars, max_pages, workers, use_cache)
+    return text, err
+
+
+def extract_pdf_text(pdf_file, max_chars=None, max_pages=None, workers=None, use_cache=True):
+    """
+    Extracts text page by page, stopping as soon as max_chars / max_pages is reached.
+    Large documents are spread over a process pool when workers > 1 (default: PDF_WORKERS env).
+    Returns (text, error_message, truncated), where truncated says whether the limits cut
+    anything off.
+    """
     try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_file.read()))
-        text = ""
-        for page in pdf_reader.pages: text += page.extract_text()
-        return text, None
-    except Exception as e: print(f"Error reading PDF: {e}"); return None, f"Error reading PDF file: {e}"
+        pdf_bytes = pdf_file.getvalue() if hasattr(pdf_file, "getvalue") else pdf_file.read()
+        key = (hashlib.sha256(pdf_bytes).hexdigest(), max_chars, max_pages)
+        if use_cache:
+            with _cache_lock:
+                if key in _TEXT_CACHE:
+                    _TEXT_CACHE.move_to_end(key)
+                    text, truncated = _TEXT_CACHE[key]
+                    return text, None, truncated
+
+        with metrics.span("pdf_extract", payload_bytes=len(pdf_bytes)) as sp:
+            pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+            total_pages = num_pages = len(pdf_reader.pages)
+            if max_pages is not None:
+                num_pages = min(num_pages, max_pages)
+            workers = int(os.getenv("PDF_WORKERS", "0")) if workers is None else workers
+
+            if workers > 1 and num_pages >= PARALLEL_MIN_PAGES:
+                pages = _iter_pages_parallel(pdf_bytes, num_pages, workers)
+            else:
+                pages = (pdf_reader.pages[i].extract_text() or "" for i in range(num_pages))
+
+            pieces, total, parsed = [], 0, 0
+            for page_text in pages:
+                parsed += 1
+                pieces.append(page_text)
+                total += len(page_text)
+                if max_chars is not None and total >= max_chars:
+                    break
+            if hasattr(pages, "close"):
+                pages.close()
+            text = "".join(pieces)
+            # Pages left unread may hold text, so stopping early counts as truncating
+            truncated = parsed < total_pages or (max_chars is not None and len(text) > max_chars)
+            if max_chars is not None:
+                text = text[:max_chars]
+            sp["pages_parsed"] = parsed
+
+        if use_cache:
+            with _cache_lock:
+                _TEXT_CACHE[key] = (text, truncated)
+                while len(_TEXT_CACHE) > _TEXT_CACHE_MAX:
+                    _TEXT_CACHE.popitem(last=False)
+        return text, None, truncated
+    except Exception as e:
+        print(f"Error reading PDF: {e}")
+        return None, f"Error reading PDF file: {e}", False
+
+
+def extract_in_background(pdf_file, **kwargs):
+    """
+    Starts extract_pdf_text on a background thread and returns its Future. The bytes are
+    read here, so the upload object doesn't need to outlive the call.
+    """
+    global _background
+    pdf_bytes = pdf_file.getvalue() if hasattr(pdf_file, "getvalue") else pdf_file.read()
+    with _pool_lock:
+        if _background is None:
+            _background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf-extract")
+        executor = _background
+    return executor.submit(extract_pdf_text, io.BytesIO(pdf_bytes), **kwargs)
+
+def report_key(interview_data):
+    """Content hash of everything the report prints."""
+    job = interview_data.get('job_details', {}) or {}
+    content = [job.get('title', 'N/A'), job.get('difficulty', 'N/A'),
+               [{k: a.get(k) for k in REPORT_FIELDS} for a in interview_data.get('answers', [])]]
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode("utf-8")).hexdigest()
 
 def create_pdf_report(interview_data):
+    key = report_key(interview_data)
+    with _cache_lock:
+        pdf_bytes = _REPORTS.get(key)
+        if pdf_bytes is not None:
+            _REPORTS.move_to_end(key)
+            return pdf_bytes
+    with metrics.span("pdf_report") as sp:
+        pdf_bytes = _build_pdf_report(interview_data)
+        sp["payload_bytes"] = len(pdf_bytes)
+    with _cache_lock:
+        _REPORTS[key] = pdf_bytes
+        while len(_REPORTS) > _REPORTS_MAX:
+            _REPORTS.popitem(last=False)
+    return pdf_bytes
+
+def _build_pdf_report(interview_data):
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Arial", 'B', 16)
@@ -0,0 +1,170 @@
+# helpers/posture_store.py
+import base64
+import math
+import time
+import zlib
+
+import numpy as np
+
+# Fixed-width record per analyzed frame; None is stored as NaN
+POSTURE_DTYPE = np.dtype([
+    ("t", "f8"),
+    ("posture_score", "f4"),
+    ("head_tilt_deg", "f4"),
+    ("shoulder_diff_px", "f4"),
+    ("hair_score", "f4"),
+])
+METRICS = ("posture_score", "head_tilt_deg", "shoulder_diff_px", "hair_score")
+
+
+class _Running:
+    """Welford mean/variance over valid (non-None) samples."""
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count, self.mean, self.m2 = 0, 0.0, 0.0
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+
+class PostureStore:
+    """
+    Bounded store for per-frame posture data.
+
+    The last `capacity` frames are kept in a NumPy ring buffer; everything else needed for
+    feedback is kept as running aggregates (mean/variance per metric, mean |head tilt|,
+    a posture-score histogram and per-time-bucket means), so memory stays flat however
+    long the interview runs and final feedback is O(1).
+    """
+
+    SCORE_BINS = 10  # posture score histogram: [0,1), [1,2), ... [9,10]
+
+    def __init__(self, capacity=2048, bucket_seconds=30.0, max_buckets=64):
+        self.capacity = capacity
+        self._buf = np.zeros(capacity, dtype=POSTURE_DTYPE)
+        self._next = 0
+        self.total = 0  # frames ever added
+        self.stats = {m: _Running() for m in METRICS}
+        self.abs_tilt = _Running()
+        self.score_hist = np.zeros(self.SCORE_BINS, dtype=np.int64)
+        self.bucket_seconds = bucket_seconds
+        self.max_buckets = max_buckets
+        self._t0 = None
+        self.buckets = {}  # bucket index -> [count, score_sum]
+
+    @classmethod
+    def from_records(cls, records, **kwargs):
+        store = cls(**kwargs)
+        store.extend(records)
+        return store
+
+    def __len__(self):
+        return self.total
+
+    def __bool__(self):
+        return self.total > 0
+
+    def append(self, d, t=None):
+        t = time.time() if t is None else t
+        i = self._next
+        self._buf["t"][i] = t
+        for m in METRICS:
+            v = d.get(m)
+            if v is None:
+                self._buf[m][i] = np.nan
+                continue
+            v = float(v)
+            self._buf[m][i] = v
+            self.stats[m].add(v)
+        self._next = (self._next + 1) % self.capacity
+        self.total += 1
+
+        tilt = d.get("head_tilt_deg")
+        if tilt is not None:
+            self.abs_tilt.add(abs(float(tilt)))
+        score = d.get("posture_score")
+        if score is not None:
+            self.score_hist[min(self.SCORE_BINS - 1, max(0, int(score)))] += 1
+            self._add_to_bucket(t, float(score))
+
+    def extend(self, records):
+        for d in records:
+            self.append(d, d.get("t"))
+
+    def _add_to_bucket(self, t, score):
+        if self._t0 is None:
+            self._t0 = t
+        b = int((t - self._t0) // self.bucket_seconds)
+        while b >= self.max_buckets:
+            # Too many buckets: double the width and merge neighbours, keeping memory bounded
+            merged = {}
+            for k, (c, s) in self.buckets.items():
+                acc = merged.setdefault(k // 2, [0, 0.0])
+                acc[0] += c; acc[1] += s
+            self.buckets = merged
+            self.bucket_seconds *= 2
+            b = int((t - self._t0) // self.bucket_seconds)
+        acc = self.buckets.setdefault(b, [0, 0.0])
+        acc[0] += 1
+        acc[1] += score
+
+    # --- aggregates ---
+    def mean(self, metric):
+        """Mean over valid samples only, or None if there were none."""
+        r = self.stats[metric]
+        return r.mean if r.count else None
+
+    def std(self, metric):
+        r = self.stats[metric]
+        return math.sqrt(r.variance) if r.count else None
+
+    def valid_count(self, metric):
+        return self.stats[metric].count
+
+    def mean_abs_tilt(self):
+        return self.abs_tilt.mean if self.abs_tilt.count else None
+
+    def timeline(self):
+        """[(bucket_start_seconds, mean_posture_score), ...] in time order."""
+        return [(k * self.bucket_seconds, s / c) for k, (c, s) in sorted(self.buckets.items()) if c]
+
+    def recent(self):
+        """The retained raw frames, oldest first, as a structured array."""
+        if self.total < self.capacity:
+            return self._buf[:self.total].copy()
+        return np.concatenate((self._buf[self._next:], self._buf[:self._next]))
+
+    # --- persistence ---
+    def to_state(self):
+        """JSON-friendly snapshot (aggregates plus the retained frames) for session persistence."""
+        return {
+            "capacity": self.capacity, "next": self._next, "total": self.total,
+            "buf": base64.b64encode(zlib.compress(self._buf.tobytes(), 1)).decode("ascii"),
+            "stats": {m: [r.count, r.mean, r.m2] for m, r in self.stats.items()},
+            "abs_tilt": [self.abs_tilt.count, self.abs_tilt.mean, self.abs_tilt.m2],
+            "score_hist": self.score_hist.tolist(),
+            "bucket_seconds": self.bucket_seconds, "max_buckets": self.max_buckets, "t0": self._t0,
+            "buckets": [[k, c, s] for k, (c, s) in self.buckets.items()],
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        store = cls(capacity=state["capacity"], bucket_seconds=state["bucket_seconds"], max_buckets=state["max_buckets"])
+        store._buf = np.frombuffer(zlib.decompress(base64.b64decode(state["buf"])), dtype=POSTURE_DTYPE).copy()
+        store._next, store.total = state["next"], state["total"]
+        for m, (count, mean, m2) in state["stats"].items():
+            r = store.stats[m]
+            r.count, r.mean, r.m2 = count, mean, m2
+        store.abs_tilt.count, store.abs_tilt.mean, store.abs_tilt.m2 = state["abs_tilt"]
+        store.score_hist = np.array(state["score_hist"], dtype=np.int64)
+        store._t0 = state["t0"]
+        store.buckets = {k: [c, s] for k, c, s in state["buckets"]}
+        return store
@@ -0,0 +1,77 @@
+# helpers/prefetch.py
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+import threading
+
+from . import metrics
+
+
+class TTSPrefetcher:
+    """
+    Per-session lookahead for question audio. While the candidate answers question N,
+    the next main question (and any freshly generated follow-ups) are synthesized in the
+    background, so the next question can play as soon as the page reruns.
+    Prefetches that turn out not to be needed are cancelled.
+    """
+
+    def __init__(self, synthesize, max_workers=2, session_id=None):
+        self.synthesize = synthesize  # text -> audio bytes
+        self.session_id = session_id
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts-prefetch")
+        self._futures = {}  # text -> Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _run(self, text):
+        metrics.set_session(self.session_id)
+        return self.synthesize(text)
+
+    def prefetch(self, text):
+        """Schedules synthesis of `text` unless it's already scheduled."""
+        if not text:
+            return
+        with self._lock:
+            fut = self._futures.get(text)
+            if fut is not None and not fut.cancelled():
+                return
+            self._futures[text] = self._executor.submit(self._run, text)
+            metrics.inc("tts_prefetch_total", state="scheduled")
+
+    def get(self, text, timeout=None):
+        """
+        Audio for `text` if it was prefetched (waiting up to `timeout` for it to finish),
+        otherwise None so the caller synthesizes inline.
+        """
+        with self._lock:
+            fut = self._futures.pop(text, None)
+        if fut is None or fut.cancelled():
+            self.misses += 1
+            return None
+        try:
+            audio = fut.result(timeout=timeout)
+            self.hits += 1
+            metrics.inc("tts_prefetch_total", state="hit")
+            return audio
+        except FuturesTimeout:
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"TTS prefetch failed: {e}")
+            self.misses += 1
+            return None
+
+    def keep_only(self, texts):
+        """Cancels every prefetch whose text isn't in `texts`."""
+        keep = set(t for t in texts if t)
+        with self._lock:
+            for text in [t for t in self._futures if t not in keep]:
+                if self._futures.pop(text).cancel():
+                    metrics.inc("tts_prefetch_total", state="cancelled")
+
+    def shutdown(self):
+        with self._lock:
+            for fut in self._futures.values():
+                fut.cancel()
+            self._futures.clear()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,80 @@
+# helpers/question_index.py
+
+
+class QuestionIndex:
+    """
+    Facet index over the question bank, built once at load.
+    Each (facet, value) pair maps to a bitset (a Python int, bit i = question i),
+    so filters are a handful of AND/OR operations instead of rescanning every question.
+    """
+
+    FACETS = ("main_subject", "difficulty", "categories")
+
+    def __init__(self, questions):
+        self.questions = list(questions)
+        self.all_mask = (1 << len(self.questions)) - 1
+        self.postings = {facet: {} for facet in self.FACETS}
+        for i, q in enumerate(self.questions):
+            bit = 1 << i
+            for value in self._values(q):
+                facet, v = value
+                self.postings[facet][v] = self.postings[facet].get(v, 0) | bit
+        # Facet counts over the whole bank, precomputed for the filter widgets
+        self.counts = {facet: {v: bin(m).count("1") for v, m in values.items()}
+                       for facet, values in self.postings.items()}
+
+    @staticmethod
+    def _values(q):
+        yield "main_subject", q.get("main_subject", "general")
+        yield "difficulty", q.get("difficulty", "N/A")
+        for cat in set(q.get("categories", [])):
+            yield "categories", cat
+
+    def values(self, facet):
+        """Sorted distinct values of a facet."""
+        return sorted(self.postings[facet])
+
+    def mask(self, facet, values, match_all=False):
+        """Bitset of questions having all (AND) or any (OR) of `values` for a facet."""
+        postings = self.postings[facet]
+        if match_all:
+            m = self.all_mask
+            for v in values:
+                m &= postings.get(v, 0)
+            return m
+        m = 0
+        for v in values:
+            m |= postings.get(v, 0)
+        return m
+
+    def filter_mask(self, subject=None, difficulty=None, categories=(), match_all_categories=True):
+        """Combined bitset for the app's filters. None / "All" / empty means no filter."""
+        m = self.all_mask
+        if subject and subject != "All":
+            m &= self.postings["main_subject"].get(subject, 0)
+        if difficulty and difficulty != "All":
+            m &= self.postings["difficulty"].get(difficulty, 0)
+        if categories:
+            m &= self.mask("categories", categories, match_all=match_all_categories)
+        return m
+
+    def select(self, mask):
+        """Questions whose bit is set in `mask`, in bank order."""
+        out = []
+        while mask:
+            low = mask & -mask
+            out.append(self.questions[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+    def filter(self, subject=None, difficulty=None, categories=(), match_all_categories=True):
+        return self.select(self.filter_mask(subject, difficulty, categories, match_all_categories))
+
+    def facet_counts(self, facet, mask=None):
+        """Per-value counts of a facet, optionally restricted to the questions in `mask`."""
+        if mask is None or mask == self.all_mask:
+            return dict(self.counts[facet])
+        return {v: bin(m & mask).count("1") for v, m in self.postings[facet].items()}
+
+    def __len__(self):
+        return len(self.questions)
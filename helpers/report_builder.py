@@ -0,0 +1,46 @@
+# helpers/report_builder.py
+import threading
+
+from . import metrics, pdf_helper
+
+
+class ReportBuilder:
+    """
+    Per-session report holder. update() is called from the script with the current session
+    state and keeps a plain snapshot of what the report prints; pdf_bytes() builds the PDF
+    from it. pdf_bytes can be handed to st.download_button as a callable, so the document is
+    only produced when the user downloads, and pdf_helper's content-hash cache returns the
+    same bytes again for as long as the interview doesn't change.
+    """
+
+    def __init__(self, session_id=None):
+        self.session_id = session_id
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    @staticmethod
+    def snapshot(interview_data):
+        # Only what the report prints; recordings, speech stats etc. are left out
+        return {
+            "job_details": dict(interview_data.get('job_details', {}) or {}),
+            "answers": [{k: a.get(k) for k in pdf_helper.REPORT_FIELDS} for a in interview_data.get('answers', [])],
+        }
+
+    def update(self, interview_data):
+        """Records the latest state for the next pdf_bytes() call."""
+        snap = self.snapshot(interview_data)
+        with self._lock:
+            self._snapshot = snap
+
+    def pdf_bytes(self):
+        """The report for the latest update()."""
+        with self._lock:
+            snap = self._snapshot
+        if snap is None:
+            return b""
+        metrics.set_session(self.session_id)
+        return pdf_helper.create_pdf_report(snap)
+
+    def shutdown(self):
+        with self._lock:
+            self._snapshot = None
@@ -0,0 +1,174 @@
+# helpers/session_store.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from .posture_store import PostureStore
+
+# Interview state that has to outlive a Streamlit process. Each field is stored as its own
+# zlib-compressed compact-JSON blob, and only fields whose content changed are rewritten.
+# Backends are picked by URL scheme (SESSION_STORE_URL); "sqlite:///path" is built in and
+# works for several app processes sharing one host/volume. Other schemes can be added with
+# register_backend() for multi-host deployments. Set SESSION_STORE_URL=none to disable.
+DEFAULT_URL = "sqlite:///" + os.path.join(os.path.expanduser("~"), ".cache", "crackgpt_sessions.sqlite")
+SESSION_TTL = float(os.getenv("SESSION_TTL_SECONDS", str(2 * 24 * 3600)))
+
+PERSISTED_FIELDS = (
+    "stage", "job_details", "resume_text", "initial_questions", "current_question_index",
+    "current_question_to_ask", "pending_followups", "answers", "posture_data",
+)
+
+
+def _dump(value):
+    if isinstance(value, PostureStore):
+        value = {"__posture_store__": value.to_state()}
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _load(blob):
+    value = json.loads(zlib.decompress(blob))
+    if isinstance(value, dict) and "__posture_store__" in value:
+        return PostureStore.from_state(value["__posture_store__"])
+    return value
+
+
+class SQLiteBackend:
+    """One row per (token, field); WAL so readers in other processes don't block the writer."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS session_fields (
+                token TEXT NOT NULL, field TEXT NOT NULL, data BLOB NOT NULL, updated REAL NOT NULL,
+                PRIMARY KEY (token, field))""")
+            conn.execute("CREATE INDEX IF NOT EXISTS session_fields_updated ON session_fields(updated)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, token):
+        rows = self._conn().execute("SELECT field, data FROM session_fields WHERE token = ?", (token,)).fetchall()
+        return {field: data for field, data in rows}
+
+    def save(self, token, changed):
+        """`changed` maps field -> compressed blob, or None to delete the field."""
+        now = time.time()
+        with self._conn() as conn:
+            for field, blob in changed.items():
+                if blob is None:
+                    conn.execute("DELETE FROM session_fields WHERE token = ? AND field = ?", (token, field))
+                else:
+                    conn.execute("INSERT OR REPLACE INTO session_fields VALUES (?, ?, ?, ?)", (token, field, blob, now))
+            # Every write refreshes the whole session, so purge() never drops half of one
+            conn.execute("UPDATE session_fields SET updated = ? WHERE token = ?", (now, token))
+
+    def delete(self, token):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM session_fields WHERE token = ?", (token,))
+
+    def purge(self, max_age):
+        with self._conn() as conn:
+            return conn.execute("DELETE FROM session_fields WHERE updated < ?", (time.time() - max_age,)).rowcount
+
+
+_BACKENDS = {"sqlite": SQLiteBackend}
+
+
+def register_backend(scheme, factory):
+    """Adds a backend for `scheme://...` URLs; `factory(rest_of_url)` returns an object with load/save/delete/purge."""
+    _BACKENDS[scheme] = factory
+
+
+def open_backend(url=None):
+    """Backend for `url` (default: SESSION_STORE_URL), or None when persistence is disabled."""
+    url = os.getenv("SESSION_STORE_URL", DEFAULT_URL) if url is None else url
+    if not url or url.lower() == "none":
+        return None
+    scheme, sep, rest = url.partition("://")
+    if not sep or scheme not in _BACKENDS:
+        raise ValueError(f"Unsupported session store URL: {url!r}")
+    if scheme == "sqlite":
+        # Same convention as SQLAlchemy: sqlite:///relative.db, sqlite:////absolute/path.db
+        rest = rest[1:] if rest.startswith("/") else rest
+    return _BACKENDS[scheme](rest)
+
+
+class SessionPersister:
+    """
+    Per-session writer. sync() serializes the persisted fields, compares them with what was
+    last written (by digest) and saves only the ones that changed.
+    """
+
+    def __init__(self, backend, token):
+        self.backend = backend
+        self.token = token
+        self._digests = {}  # field -> digest of the last written JSON
+
+    def sync(self, state):
+        """Writes changed fields of `state` (e.g. st.session_state). Returns how many were written."""
+        changed, digests = {}, {}
+        for field in PERSISTED_FIELDS:
+            if field not in state:
+                if field in self._digests:
+                    changed[field] = None
+                    digests[field] = None
+                continue
+            raw = _dump(state[field])
+            digest = hashlib.blake2b(raw, digest_size=16).digest()
+            if self._digests.get(field) != digest:
+                changed[field] = zlib.compress(raw, 6)
+                digests[field] = digest
+        if not changed:
+            return 0
+        try:
+            self.backend.save(self.token, changed)
+        except Exception as e:
+            print(f"Session persistence failed: {e}")
+            return 0
+        for field, digest in digests.items():
+            if digest is None:
+                self._digests.pop(field, None)
+            else:
+                self._digests[field] = digest
+        return len(changed)
+
+    def restore(self, state):
+        """Loads the stored fields into `state`. Returns False if nothing is stored under the token."""
+        try:
+            stored = self.backend.load(self.token)
+        except Exception as e:
+            print(f"Session restore failed: {e}")
+            return False
+        if not stored:
+            return False
+        for field, blob in stored.items():
+            if field not in PERSISTED_FIELDS:
+                continue
+            try:
+                state[field] = _load(blob)
+            except Exception as e:
+                print(f"Could not restore session field {field}: {e}")
+                continue
+            self._digests[field] = hashlib.blake2b(zlib.decompress(blob), digest_size=16).digest()
+        return True
+
+    def delete(self):
+        try:
+            self.backend.delete(self.token)
+        except Exception as e:
+            print(f"Session delete failed: {e}")
+        self._digests.clear()
@@ -1,4 +1,10 @@
 # helpers/transcribe.py
+import io
+import struct
+import threading
+import time
+
+from . import metrics
 
 # A list of common English filler words. You can add more if you like.
 FILLER_WORDS = [
@@ -6,49 +12,297 @@ FILLER_WORDS = [
     "like", "you know", "i mean", "so", "right",
     "basically", "actually", "literally", "i think"
 ]
-# We'll check for variations, e.g., "um,"
-FILLER_CHECK = tuple([f.lower() for f in FILLER_WORDS])
 
-def transcribe_file(tmp_file_path, hf_token):
+PAUSE_THRESHOLD_S = 0.5  # gaps between words longer than this count as hesitation pauses
+_STRIP_CHARS = " ,.?!;:\"'-"
+
+
+def _build_filler_trie(phrases):
+    # token -> child node; "$" marks the end of a filler phrase
+    root = {}
+    for phrase in phrases:
+        node = root
+        for tok in phrase.lower().split():
+            node = node.setdefault(tok, {})
+        node["$"] = True
+    return root
+
+
+FILLER_TRIE = _build_filler_trie(FILLER_WORDS)
+
+
+class SpeechAnalyzer:
+    """
+    Single-pass analysis over Whisper segments as the generator yields them.
+    Multi-word fillers ("you know", "i mean") are matched with a token trie, keeping only
+    the partial matches still alive, and pause / speaking-rate metrics come from the word
+    timestamps in the same pass. Only counters are kept, never a copy of the words.
+    """
+
+    def __init__(self, trie=FILLER_TRIE, pause_threshold=PAUSE_THRESHOLD_S):
+        self.trie = trie
+        self.pause_threshold = pause_threshold
+        self._active = []  # trie nodes of filler phrases matched so far
+        self.filler_count = 0
+        self.fillers = {}
+        self.word_count = 0
+        self.pause_count = 0
+        self.pause_total = 0.0
+        self.longest_pause = 0.0
+        self._first_start = None
+        self._last_end = None
+
+    def feed_word(self, text, start=None, end=None):
+        tok = text.lower().strip(_STRIP_CHARS)
+        if not tok:
+            return
+        self.word_count += 1
+
+        # Advance live partial matches and start a new one at this word
+        next_active = []
+        for node, phrase in self._active + [(self.trie, "")]:
+            child = node.get(tok)
+            if child is None:
+                continue
+            matched = f"{phrase} {tok}".strip()
+            if child.get("$"):
+                self.filler_count += 1
+                self.fillers[matched] = self.fillers.get(matched, 0) + 1
+            if len(child) > (1 if "$" in child else 0):
+                next_active.append((child, matched))
+        self._active = next_active
+
+        if start is not None and end is not None:
+            if self._first_start is None:
+                self._first_start = start
+            if self._last_end is not None:
+                gap = start - self._last_end
+                if gap > self.pause_threshold:
+                    self.pause_count += 1
+                    self.pause_total += gap
+                    self.longest_pause = max(self.longest_pause, gap)
+            self._last_end = end
+
+    def feed_segment(self, segment):
+        for word in (segment.words or []):
+            self.feed_word(word.word, word.start, word.end)
+
+    def stats(self):
+        duration = (self._last_end - self._first_start) if self._first_start is not None else 0.0
+        speaking = max(0.0, duration - self.pause_total)
+        return {
+            "filler_count": self.filler_count,
+            "fillers": dict(self.fillers),
+            "word_count": self.word_count,
+            "duration_s": round(duration, 2),
+            "pause_count": self.pause_count,
+            "pause_total_s": round(self.pause_total, 2),
+            "longest_pause_s": round(self.longest_pause, 2),
+            "words_per_minute": round(self.word_count / duration * 60, 1) if duration > 0 else None,
+            "articulation_wpm": round(self.word_count / speaking * 60, 1) if speaking > 0 else None,
+        }
+
+# --- Shared model registry ---
+# Loading WhisperModel weights costs more than decoding a short answer, so models
+# are loaded once per process and shared by every session.
+# Keyed by (model_size, compute_type, cpu_threads, num_workers) -> {"model": ..., "last_used": ...}
+DEFAULT_MODEL_SIZE = "tiny.en"
+DEFAULT_COMPUTE_TYPE = "int8"
+DEFAULT_CPU_THREADS = 0  # 0 lets CTranslate2 pick
+
+_MODEL_CACHE = {}
+_MODEL_LOCK = threading.Lock()
+
+
+def get_whisper_model(hf_token=None, model_size=DEFAULT_MODEL_SIZE,
+                      compute_type=DEFAULT_COMPUTE_TYPE, cpu_threads=DEFAULT_CPU_THREADS, num_workers=1):
+    """
+    Returns a shared WhisperModel for the given configuration, loading it on first use.
+    num_workers > 1 lets that many transcriptions run on the model at the same time.
+    """
+    key = (model_size, compute_type, int(cpu_threads), int(num_workers))
+    with _MODEL_LOCK:
+        entry = _MODEL_CACHE.get(key)
+        if entry is None:
+            from faster_whisper import WhisperModel
+            model = WhisperModel(
+                model_size_or_path=model_size,
+                device="cpu",
+                compute_type=compute_type,
+                cpu_threads=int(cpu_threads),
+                num_workers=int(num_workers),
+                use_auth_token=hf_token
+            )
+            entry = {"model": model, "last_used": time.monotonic()}
+            _MODEL_CACHE[key] = entry
+        entry["last_used"] = time.monotonic()
+        return entry["model"]
+
+
+def warm_up(hf_token=None, model_size=DEFAULT_MODEL_SIZE,
+            compute_type=DEFAULT_COMPUTE_TYPE, cpu_threads=DEFAULT_CPU_THREADS, background=True):
+    """
+    Preloads a model so the first answer doesn't pay for loading weights.
+    Runs in a daemon thread by default. Returns the thread (or None if run inline).
+    """
+    def _load():
+        try:
+            get_whisper_model(hf_token, model_size, compute_type, cpu_threads)
+        except Exception as e:
+            print(f"Whisper warm-up failed: {e}")
+
+    if not background:
+        _load()
+        return None
+    t = threading.Thread(target=_load, name="whisper-warmup", daemon=True)
+    t.start()
+    return t
+
+
+def evict_idle_models(max_idle_seconds=1800):
     """
-    Transcribes the audio file and counts filler words.
+    Drops models that haven't been used for max_idle_seconds. Returns number evicted.
+    """
+    now = time.monotonic()
+    with _MODEL_LOCK:
+        stale = [k for k, v in _MODEL_CACHE.items() if now - v["last_used"] > max_idle_seconds]
+        for k in stale:
+            del _MODEL_CACHE[k]
+    return len(stale)
+
+
+def loaded_models():
+    """Returns the keys of the currently loaded models."""
+    with _MODEL_LOCK:
+        return list(_MODEL_CACHE.keys())
+
+
+# --- In-memory decoding ---
+WHISPER_SAMPLE_RATE = 16000
+
+
+def _parse_wav(buf):
+    """
+    Walks the RIFF chunks of a PCM WAV held in a memoryview.
+    Returns (sample_rate, channels, bits_per_sample, format_tag, data_view) or None if it isn't plain PCM.
+    """
+    if len(buf) < 12 or buf[0:4] != b"RIFF" or buf[8:12] != b"WAVE":
+        return None
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(buf):
+        chunk_id = bytes(buf[pos:pos + 4])
+        (size,) = struct.unpack_from("<I", buf, pos + 4)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            audio_format, channels, rate = struct.unpack_from("<HHI", buf, body)
+            (bits,) = struct.unpack_from("<H", buf, body + 14)
+            if audio_format not in (1, 3, 0xFFFE):
+                return None
+            fmt = (rate, channels, bits, audio_format)
+        elif chunk_id == b"data" and fmt is not None:
+            end = min(body + size, len(buf))
+            return fmt + (buf[body:end],)
+        pos = body + size + (size & 1)
+    return None
+
+
+def decode_audio_bytes(raw_bytes):
+    """
+    Decodes recorder bytes straight to a mono float32 16 kHz NumPy array, no temp file.
+    PCM WAV is read through zero-copy views of the buffer; anything else
+    (e.g. webm/ogg from the browser) goes through faster-whisper's PyAV decoder in memory.
+    """
+    import numpy as np
+
+    buf = memoryview(raw_bytes)
+    wav = _parse_wav(buf)
+    if wav is not None:
+        rate, channels, bits, fmt_tag, data = wav
+        if bits == 16:
+            pcm = np.frombuffer(data, dtype="<i2", count=len(data) // 2)
+            audio = pcm.astype(np.float32)
+            audio *= 1.0 / 32768.0
+        elif bits == 32 and fmt_tag == 3:
+            # 32-bit float WAV is already in the right range, so this is a pure view
+            audio = np.frombuffer(data, dtype="<f4", count=len(data) // 4)
+        elif bits == 8:
+            pcm = np.frombuffer(data, dtype=np.uint8)
+            audio = (pcm.astype(np.float32) - 128.0) / 128.0
+        else:
+            wav = None
+
+    if wav is None:
+        from faster_whisper.audio import decode_audio
+        return decode_audio(io.BytesIO(raw_bytes), sampling_rate=WHISPER_SAMPLE_RATE)
+
+    if channels > 1:
+        usable = (len(audio) // channels) * channels
+        audio = audio[:usable].reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    if rate != WHISPER_SAMPLE_RATE and len(audio):
+        n_out = int(round(len(audio) * WHISPER_SAMPLE_RATE / rate))
+        x_old = np.arange(len(audio), dtype=np.float64)
+        x_new = np.linspace(0, len(audio) - 1, n_out)
+        audio = np.interp(x_new, x_old, audio).astype(np.float32)
+    return audio
+
+
+def transcribe_bytes(raw_bytes, hf_token, with_stats=False):
+    """
+    Same as transcribe_file, but takes the raw recorder bytes and decodes them in memory.
+    Returns (transcription_string, filler_word_count, error_message[, speech_stats])
+    """
+    with metrics.span("audio_decode", payload_bytes=len(raw_bytes)):
+        try:
+            audio = decode_audio_bytes(raw_bytes)
+        except Exception as e:
+            err = f"Audio decode error: {e}"
+            return (None, 0, err, {}) if with_stats else (None, 0, err)
+    return transcribe_file(audio, hf_token, with_stats=with_stats)
+
+
+def transcribe_file(tmp_file_path, hf_token, with_stats=False, model=None):
+    """
+    Transcribes the audio file (path, file-like or float32 16 kHz array) and counts filler words.
     Returns (transcription_string, filler_word_count, error_message)
+    With with_stats=True a fourth item is added: SpeechAnalyzer.stats() (pauses, speaking rate, fillers).
+    `model` overrides the default shared WhisperModel (e.g. one configured for a batch worker).
     """
     try:
-        from faster_whisper import WhisperModel
+        from faster_whisper import WhisperModel  # noqa: F401
     except Exception as e:
-        return None, 0, f"Import error: {e}"
+        err = f"Import error: {e}"
+        return (None, 0, err, {}) if with_stats else (None, 0, err)
+
+    with metrics.span("transcription") as sp:
+        text, stats, err = _transcribe(tmp_file_path, hf_token, model)
+        sp["words"] = stats.get("word_count", 0)
+        if err: sp["error"] = err
+    count = stats.get("filler_count", 0)
+    return (text, count, err, stats) if with_stats else (text, count, err)
+
 
+def _transcribe(tmp_file_path, hf_token, model=None):
     try:
-        whisper_model = WhisperModel(
-            model_size_or_path="tiny.en",
-            device="cpu",
-            use_auth_token=hf_token
-        )
-        
+        whisper_model = model or get_whisper_model(hf_token)
+
         # --- MODIFICATION: Enable word_timestamps ---
         segments, _ = whisper_model.transcribe(
-            tmp_file_path, 
+            tmp_file_path,
             word_timestamps=True
         )
 
-        full_transcription = ""
-        filler_count = 0
-        
+        # Segments are consumed as Whisper yields them: text pieces are collected once
+        # and the analyzer counts fillers/pauses on the fly
+        analyzer = SpeechAnalyzer()
+        pieces = []
         for segment in segments:
-            # Add segment text to the full transcription
-            full_transcription += segment.text + " "
-            
-            # Iterate through each word in the segment
-            for word in segment.words:
-                # Clean the word (lowercase, remove punctuation)
-                cleaned_word = word.word.lower().strip(" ,.?!")
-                
-                # Check if it's a filler word
-                if cleaned_word in FILLER_CHECK:
-                    filler_count += 1
-        
-        return full_transcription.strip(), filler_count, None
+            pieces.append(segment.text.strip())
+            analyzer.feed_segment(segment)
+
+        # Opportunistically free models nobody has used in a while
+        evict_idle_models()
+        return " ".join(p for p in pieces if p), analyzer.stats(), None
 
     except Exception as e:
-        return None, 0, f"Transcription error: {e}"
\ No newline at end of file
+        return None, {}, f"Transcription error: {e}"
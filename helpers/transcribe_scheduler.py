@@ -0,0 +1,225 @@
+# helpers/transcribe_scheduler.py
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+import numpy as np
+
+from . import metrics, transcribe
+
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 30  # Whisper's window; every clip handed to the batched pipeline must fit in it
+MODEL_RETRY_SECONDS = 60  # after a failed model load, answers get the error until this has passed
+
+
+class _Job:
+    __slots__ = ("session_id", "audio", "future", "queued_at")
+
+    def __init__(self, session_id, audio):
+        self.session_id = session_id
+        self.audio = audio
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+
+
+class TranscriptionScheduler:
+    """
+    Process-wide transcription service shared by every session.
+
+    Answers from all sessions are queued per session and picked round-robin (one job per
+    session per turn), so one busy session can't starve the others. Each worker thread takes
+    a batch of up to `max_batch_jobs` answers / `max_batch_seconds` of audio, concatenates them
+    and runs them through faster-whisper's BatchedInferencePipeline in one call, with each
+    answer's VAD speech clips as clip_timestamps; segments are routed back to their answer
+    by time offset. cpu_threads x num_workers is pinned to the host's cores.
+    """
+
+    def __init__(self, hf_token=None, model_size=transcribe.DEFAULT_MODEL_SIZE,
+                 compute_type=transcribe.DEFAULT_COMPUTE_TYPE, num_workers=None, cpu_threads=None,
+                 max_batch_jobs=8, max_batch_seconds=240.0, batch_size=8, linger_ms=30):
+        cores = os.cpu_count() or 1
+        self.num_workers = num_workers or int(os.getenv("TRANSCRIBE_WORKERS", "0")) or max(1, min(4, cores // 4))
+        self.cpu_threads = cpu_threads or max(1, cores // self.num_workers)
+        self.hf_token = hf_token
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.max_batch_jobs = max_batch_jobs
+        self.max_batch_seconds = max_batch_seconds
+        self.batch_size = batch_size
+        self.linger = linger_ms / 1000.0
+        self._queues = OrderedDict()  # session_id -> deque of jobs, in round-robin order
+        self._cond = threading.Condition()
+        self._closed = False
+        self._model = None
+        self._model_error = None
+        self._model_failed_at = None  # monotonic time of the last failed load
+        self._model_lock = threading.Lock()
+        self._local = threading.local()
+        self.batches = 0
+        self.jobs_done = 0
+        self._threads = [threading.Thread(target=self._loop, name=f"transcribe-{i}", daemon=True)
+                         for i in range(self.num_workers)]
+        for t in self._threads:
+            t.start()
+
+    # --- model ---
+    def _get_model(self):
+        with self._model_lock:
+            if self._model is None and (self._model_failed_at is None
+                                        or time.monotonic() - self._model_failed_at >= MODEL_RETRY_SECONDS):
+                try:
+                    self._model = transcribe.get_whisper_model(self.hf_token, self.model_size, self.compute_type,
+                                                               self.cpu_threads, self.num_workers)
+                    self._model_error = None
+                except Exception as e:
+                    self._model_error = f"Transcription error: {e}"
+                    self._model_failed_at = time.monotonic()
+            return self._model
+
+    def _get_pipeline(self):
+        # One pipeline per worker thread (it keeps per-call state); all of them share the model
+        pipeline = getattr(self._local, "pipeline", None)
+        if pipeline is None:
+            model = self._get_model()
+            if model is None:
+                return None
+            from faster_whisper import BatchedInferencePipeline
+            pipeline = self._local.pipeline = BatchedInferencePipeline(model)
+        return pipeline
+
+    def warm_up(self, background=True):
+        """Loads the model ahead of the first answer."""
+        if not background:
+            self._get_model()
+            return None
+        t = threading.Thread(target=self._get_model, name="whisper-warmup", daemon=True)
+        t.start()
+        return t
+
+    # --- public API ---
+    def submit(self, audio, session_id=None):
+        """Queues a float32 16 kHz array. The future resolves to (text, speech_stats, error)."""
+        job = _Job(session_id, audio)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Transcription scheduler is shut down")
+            self._queues.setdefault(session_id, deque()).append(job)
+            self._cond.notify()
+        return job.future
+
+    def transcribe_bytes(self, raw_bytes, session_id=None, timeout=None):
+        """Drop-in for transcribe.transcribe_bytes(..., with_stats=True): (text, filler_count, error, stats)."""
+        with metrics.span("audio_decode", payload_bytes=len(raw_bytes)):
+            try:
+                audio = transcribe.decode_audio_bytes(raw_bytes)
+            except Exception as e:
+                return None, 0, f"Audio decode error: {e}", {}
+        with metrics.span("transcription") as sp:
+            try:
+                text, stats, err = self.submit(audio, session_id).result(timeout=timeout)
+            except FuturesTimeout:
+                text, stats, err = None, {}, "Transcription timed out"
+            sp["words"] = stats.get("word_count", 0)
+            if err: sp["error"] = err
+        return text, stats.get("filler_count", 0), err, stats
+
+    def queued(self):
+        with self._cond:
+            return {sid: len(q) for sid, q in self._queues.items() if q}
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            pending = [job for q in self._queues.values() for job in q]
+            self._queues.clear()
+            self._cond.notify_all()
+        for job in pending:
+            job.future.cancel()
+
+    # --- scheduling ---
+    def _take_batch(self):
+        """Round-robin over sessions: one job from each in turn until the batch is full. Caller holds the lock."""
+        batch, seconds = [], 0.0
+        while len(batch) < self.max_batch_jobs and self._queues:
+            sid, q = next(iter(self._queues.items()))
+            job = q[0]
+            job_seconds = len(job.audio) / SAMPLE_RATE
+            if batch and seconds + job_seconds > self.max_batch_seconds:
+                break
+            q.popleft()
+            batch.append(job)
+            seconds += job_seconds
+            # This session goes to the back of the line (or leaves it when drained)
+            del self._queues[sid]
+            if q:
+                self._queues[sid] = q
+        return batch
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._queues:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # Give answers arriving at the same moment a chance to share the batch
+                if self.linger and sum(len(q) for q in self._queues.values()) < self.max_batch_jobs:
+                    self._cond.wait(self.linger)
+                batch = self._take_batch()
+            if batch:
+                self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        now = time.perf_counter()
+        for job in batch:
+            metrics.observe("transcription_queue", now - job.queued_at)
+        try:
+            pipeline = self._get_pipeline()
+        except Exception as e:
+            pipeline, self._model_error = None, f"Transcription error: {e}"
+        if pipeline is None:
+            for job in batch:
+                job.future.set_result((None, {}, self._model_error))
+            return
+        try:
+            with metrics.span("transcription_batch", trace=False, jobs=len(batch)):
+                results = self._transcribe_batch(pipeline, batch)
+        except Exception as e:
+            results = [(None, {}, f"Transcription error: {e}")] * len(batch)
+        self.batches += 1
+        self.jobs_done += len(batch)
+        for job, result in zip(batch, results):
+            job.future.set_result(result)
+
+    def _transcribe_batch(self, pipeline, batch):
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+        vad = VadOptions(max_speech_duration_s=CHUNK_SECONDS, min_silence_duration_ms=160)
+        pieces, clips, starts = [], [], []
+        offset = 0
+        for job in batch:
+            audio = np.asarray(job.audio, dtype=np.float32)
+            starts.append(offset / SAMPLE_RATE)
+            for ts in get_speech_timestamps(audio, vad):
+                clips.append({"start": (offset + ts["start"]) / SAMPLE_RATE, "end": (offset + ts["end"]) / SAMPLE_RATE})
+            pieces.append(audio)
+            offset += len(audio)
+
+        analyzers = [transcribe.SpeechAnalyzer() for _ in batch]
+        texts = [[] for _ in batch]
+        if clips:
+            segments, _ = pipeline.transcribe(np.concatenate(pieces), clip_timestamps=clips,
+                                              batch_size=self.batch_size, word_timestamps=True)
+            for segment in segments:
+                # Clips never cross answers, so a segment belongs to the last answer starting at or before it
+                i = int(np.searchsorted(starts, segment.start + 1e-3, side="right")) - 1
+                i = min(max(i, 0), len(batch) - 1)
+                texts[i].append(segment.text.strip())
+                analyzers[i].feed_segment(segment)
+        return [(" ".join(t for t in text if t), analyzer.stats(), None) for text, analyzer in zip(texts, analyzers)]
@@ -0,0 +1,202 @@
+# helpers/tts_cache.py
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Two-tier cache for synthesized speech, shared by google_tts and eleven.
+# Key = sha256(provider, voice, text, audio config), so the same question in the same
+# voice is only ever synthesized once per host.
+CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "crackgpt_tts"))
+MEMORY_MAX_BYTES = int(os.getenv("TTS_CACHE_MEMORY_MB", "64")) * 1024 * 1024
+DISK_MAX_BYTES = int(os.getenv("TTS_CACHE_DISK_MB", "512")) * 1024 * 1024
+
+
+def make_key(provider, voice, text, audio_config=None):
+    config_hash = json.dumps(audio_config or {}, sort_keys=True, separators=(",", ":"))
+    raw = json.dumps([provider, voice, text, config_hash], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Memory tier guarded by one lock that is only held for dict operations; disk reads, writes
+    and eviction happen outside it (eviction under its own lock). Concurrent requests for the
+    same missing key wait for one synthesis instead of each calling the API.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, memory_max_bytes=MEMORY_MAX_BYTES, disk_max_bytes=DISK_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._mem = OrderedDict()  # key -> bytes, oldest first
+        self._mem_bytes = 0
+        self._disk_bytes = None  # computed lazily on first write
+        self._lock = threading.Lock()       # memory tier, counters, in-flight table
+        self._disk_lock = threading.Lock()  # disk size accounting and eviction
+        self._inflight = {}  # key -> Event set when the caller loading it is done
+        self.hits = 0
+        self.misses = 0
+
+    # --- memory tier ---
+    def _mem_get(self, key):
+        audio = self._mem.get(key)
+        if audio is not None:
+            self._mem.move_to_end(key)
+        return audio
+
+    def _mem_put(self, key, audio):
+        if len(audio) > self.memory_max_bytes:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= len(old)
+        self._mem[key] = audio
+        self._mem_bytes += len(audio)
+        while self._mem_bytes > self.memory_max_bytes and self._mem:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_bytes -= len(evicted)
+
+    # --- disk tier ---
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".bin")
+
+    def _disk_entries(self):
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".bin"):
+                    p = os.path.join(root, name)
+                    try:
+                        st = os.stat(p)
+                        entries.append((st.st_mtime, st.st_size, p))
+                    except OSError:
+                        pass
+        return entries
+
+    def _disk_get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)  # mtime doubles as last-access time for eviction
+            return audio
+        except OSError:
+            return None
+
+    def _disk_put(self, key, audio):
+        if not self.disk_max_bytes or len(audio) > self.disk_max_bytes:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, path)  # atomic, so concurrent readers never see half a file
+        except OSError as e:
+            print(f"TTS cache write failed: {e}")
+            return
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+            else:
+                self._disk_bytes += len(audio)
+            if self._disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        # Caller holds _disk_lock. Oldest-accessed first, down to 90% of the budget so we don't evict on every write
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.disk_max_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+    # --- public API ---
+    def get(self, key):
+        with self._lock:
+            audio = self._mem_get(key)
+        if audio is None:
+            audio = self._disk_get(key)
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+            else:
+                self._mem_put(key, audio)
+                self.hits += 1
+        return audio
+
+    def put(self, key, audio):
+        with self._lock:
+            self._mem_put(key, audio)
+        self._disk_put(key, audio)
+
+    def fetch(self, provider, voice, text, audio_config, synthesize):
+        """
+        (audio, cached) for this (provider, voice, text, config). On a miss `synthesize()` is
+        called and its result stored; other callers asking for the same key meanwhile wait
+        for it rather than synthesizing too.
+        """
+        key = make_key(provider, voice, text, audio_config)
+        while True:
+            with self._lock:
+                audio = self._mem_get(key)
+                if audio is not None:
+                    self.hits += 1
+                    return audio, True
+                pending = self._inflight.get(key)
+                if pending is None:
+                    pending = self._inflight[key] = threading.Event()
+                    break
+            # Someone else is loading it; if they failed, the next round takes over
+            pending.wait()
+        try:
+            audio = self._disk_get(key)
+            with self._lock:
+                if audio is not None:
+                    self._mem_put(key, audio)
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            if audio is not None:
+                return audio, True
+            audio = synthesize()
+            self.put(key, audio)
+            return audio, False
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set()
+
+    def get_or_synthesize(self, provider, voice, text, audio_config, synthesize):
+        """Cached audio for this (provider, voice, text, config), synthesized only on a miss."""
+        return self.fetch(provider, voice, text, audio_config, synthesize)[0]
+
+    def clear_memory(self):
+        with self._lock:
+            self._mem.clear()
+            self._mem_bytes = 0
+
+
+_DEFAULT_CACHE = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache instance."""
+    global _DEFAULT_CACHE
+    with _DEFAULT_LOCK:
+        if _DEFAULT_CACHE is None:
+            _DEFAULT_CACHE = TTSCache()
+        return _DEFAULT_CACHE
@@ -1,7 +1,12 @@
 # helpers/video_helper.py
+import threading
+import time
+
 import cv2
 import numpy as np
 
+from . import metrics
+
 try:
     import mediapipe as mp
     MP_AVAILABLE = True
@@ -10,27 +15,258 @@ try:
 except ImportError:
     MP_AVAILABLE = False
 
-def init_detectors():
+def init_detectors(model_complexity=1):
     if not MP_AVAILABLE:
         return None, None
     try:
-        pose = mp_pose.Pose(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+        pose = mp_pose.Pose(model_complexity=model_complexity, min_detection_confidence=0.5, min_tracking_confidence=0.5)
         face = mp_face.FaceDetection(min_detection_confidence=0.5)
         return pose, face
     except Exception as e:
         print(f"Failed to initialize MediaPipe detectors: {e}")
         return None, None
 
-def analyze_frame(frame, pose_detector, face_detector):
+def init_pose(model_complexity=1):
+    """A Pose graph alone (e.g. the lite model FaceTracker falls back to), or None."""
+    if not MP_AVAILABLE:
+        return None
+    try:
+        return mp_pose.Pose(model_complexity=model_complexity, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    except Exception as e:
+        print(f"Failed to initialize MediaPipe pose detector: {e}")
+        return None
+
+def close_detectors(*detectors):
+    for d in detectors:
+        if d is not None:
+            try: d.close()
+            except Exception as e: print(f"Failed to close MediaPipe detector: {e}")
+
+class DetectorPool:
+    """
+    Process-level owner of MediaPipe graphs. Each session gets one (pose, face) pair that is
+    reused across streams and closed explicitly, instead of building new graphs on every
+    rerun and leaking the old ones.
+
+    acquire()/release() are a lease held by whoever runs the graphs (the frame analysis
+    thread). Graphs are only ever closed while nobody holds a lease: discard() on a leased
+    pair defers the close to the last release(), and release_idle() skips leased pairs.
+    """
+
+    def __init__(self, model_complexity=1, idle_seconds=1800):
+        self.model_complexity = model_complexity
+        self.idle_seconds = idle_seconds
+        self._sessions = {}  # session_id -> {"pose", "face", "last_used", "leases", "discarded"}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.closed = 0
+
+    def acquire(self, session_id):
+        """Leases this session's (pose, face), creating them on first use. Pair with release()."""
+        self.release_idle()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                return self._lease(entry)
+        # Graph construction is slow, so it happens outside the lock
+        pose, face = init_detectors(self.model_complexity)
+        if pose is None or face is None:
+            close_detectors(pose, face)
+            return None, None
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = {"pose": pose, "face": face, "leases": 0, "discarded": False}
+                self._sessions[session_id] = entry
+                self.created += 2
+                metrics.inc("detector_graphs_total", 2, event="created")
+                spare = None
+            else:
+                spare = (pose, face)  # another caller for this session got there first
+            pair = self._lease(entry)
+        if spare is not None:
+            close_detectors(*spare)
+        return pair
+
+    @staticmethod
+    def _lease(entry):
+        # Caller holds the lock
+        entry["leases"] += 1
+        entry["discarded"] = False
+        entry["last_used"] = time.monotonic()
+        return entry["pose"], entry["face"]
+
+    def release(self, session_id):
+        """Ends a lease. The graphs stay pooled for the session unless it was discarded meanwhile."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return
+            entry["leases"] = max(0, entry["leases"] - 1)
+            entry["last_used"] = time.monotonic()
+            close = entry["leases"] == 0 and entry["discarded"]
+        if close:
+            self._close(session_id, entry)
+
+    def discard(self, session_id):
+        """The session is done with its graphs: closes them now, or at the last release() if leased."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return
+            entry["discarded"] = True
+            close = entry["leases"] == 0
+        if close:
+            self._close(session_id, entry)
+
+    def _close(self, session_id, entry):
+        with self._lock:
+            # Someone may have re-acquired between the decision and now
+            if self._sessions.get(session_id) is not entry or entry["leases"]:
+                return
+            del self._sessions[session_id]
+            self.closed += 2
+        metrics.inc("detector_graphs_total", 2, event="closed")
+        close_detectors(entry["pose"], entry["face"])
+
+    def release_idle(self, max_idle_seconds=None):
+        """Closes unleased detectors of sessions that went away without discarding (e.g. closed tab)."""
+        limit = self.idle_seconds if max_idle_seconds is None else max_idle_seconds
+        now = time.monotonic()
+        with self._lock:
+            stale = [(sid, e) for sid, e in self._sessions.items() if not e["leases"] and now - e["last_used"] > limit]
+        for sid, entry in stale:
+            self._close(sid, entry)
+        return len(stale)
+
+    def stats(self):
+        with self._lock:
+            return {"created": self.created, "closed": self.closed, "active_sessions": len(self._sessions),
+                    "leased_sessions": sum(1 for e in self._sessions.values() if e["leases"])}
+
+class FaceTracker:
+    """
+    Per-stream state for reduced-cadence face detection.
+
+    The face box is estimated from the pose landmarks analyze_frame already has (nose, eyes):
+    full FaceDetection only runs every `detect_every` frames, or when the landmark-based
+    estimate drifts too far from where the last detection was anchored. In between, the last
+    detected box is moved/scaled with the landmarks.
+
+    It also adapts to a per-frame time budget: when analysis runs over budget the working
+    resolution steps down (and, at the lowest step, a lighter pose model is used if a
+    `lite_pose_factory` was given); when comfortably under budget it steps back up.
+    """
+
+    WIDTHS = (480, 384, 320)
+
+    def __init__(self, detect_every=5, drift_threshold=0.06, frame_budget_ms=60.0, lite_pose_factory=None):
+        self.detect_every = detect_every
+        self.drift_threshold = drift_threshold
+        self.frame_budget_ms = frame_budget_ms
+        self.lite_pose_factory = lite_pose_factory
+        self._lite_pose = None
+        self._width_step = 0
+        self._degraded = False
+        self._frames_since_detect = None
+        self._box = None      # relative (x, y, w, h) from the last detection
+        self._anchor = None   # (cx, cy, eye_dist) of the landmarks at that detection
+        self._avg_ms = None
+        self.detections = 0
+        self.tracked = 0
+
+    @property
+    def target_width(self):
+        return self.WIDTHS[self._width_step]
+
+    def pose_detector(self, default):
+        if self._degraded and self.lite_pose_factory is not None:
+            if self._lite_pose is None:
+                self._lite_pose = self.lite_pose_factory()
+            return self._lite_pose
+        return default
+
+    @staticmethod
+    def landmark_anchor(nose, left_eye, right_eye):
+        cx = (nose.x + left_eye.x + right_eye.x) / 3
+        cy = (nose.y + left_eye.y + right_eye.y) / 3
+        eye_dist = max(1e-4, float(np.hypot(left_eye.x - right_eye.x, left_eye.y - right_eye.y)))
+        return cx, cy, eye_dist
+
+    def needs_detection(self, anchor):
+        if self._box is None or anchor is None or self._anchor is None:
+            return True
+        if self._frames_since_detect is None or self._frames_since_detect + 1 >= self.detect_every:
+            return True
+        cx, cy, d = anchor
+        ax, ay, ad = self._anchor
+        moved = np.hypot(cx - ax, cy - ay)
+        rescaled = abs(d - ad) / ad
+        return moved > self.drift_threshold or rescaled > 0.25
+
+    def on_detection(self, box, anchor):
+        self._box = box
+        self._anchor = anchor
+        self._frames_since_detect = 0
+        self.detections += 1
+
+    def estimate(self, anchor):
+        """Last detected box shifted and scaled by how the landmarks moved since then."""
+        self._frames_since_detect += 1
+        self.tracked += 1
+        x, y, bw, bh = self._box
+        cx, cy, d = anchor
+        ax, ay, ad = self._anchor
+        scale = d / ad
+        nbw, nbh = bw * scale, bh * scale
+        # keep the box centred the same way relative to the landmark centroid
+        ncx = cx + (x + bw / 2 - ax) * scale
+        ncy = cy + (y + bh / 2 - ay) * scale
+        return ncx - nbw / 2, ncy - nbh / 2, nbw, nbh
+
+    def close(self):
+        close_detectors(self._lite_pose)
+        self._lite_pose = None
+
+    def forget(self):
+        self._box = None
+        self._anchor = None
+        self._frames_since_detect = None
+
+    def record(self, elapsed_ms):
+        """Feeds the time one analysis took into the resolution/model adaptation."""
+        self._avg_ms = elapsed_ms if self._avg_ms is None else 0.7 * self._avg_ms + 0.3 * elapsed_ms
+        if self._avg_ms > self.frame_budget_ms:
+            if self._width_step < len(self.WIDTHS) - 1:
+                self._width_step += 1
+            else:
+                self._degraded = True
+            self._avg_ms = None  # re-measure at the new setting
+        elif self._avg_ms < 0.5 * self.frame_budget_ms:
+            if self._degraded:
+                self._degraded = False
+            elif self._width_step > 0:
+                self._width_step -= 1
+            else:
+                return
+            self._avg_ms = None
+
+
+def analyze_frame(frame, pose_detector, face_detector, tracker=None):
     """
     Input: BGR frame (numpy)
     Returns dict with posture metrics and hair heuristic.
+    Pass a FaceTracker to enable reduced-cadence face detection and time-budget adaptation.
     """
     if not MP_AVAILABLE or pose_detector is None or face_detector is None:
         return {"error": "MediaPipe not available or detectors not initialized."}
 
+    t_start = time.perf_counter()
+    if tracker is not None:
+        pose_detector = tracker.pose_detector(pose_detector)
+
     # --- OPTIMIZATION 1: Resize frame for much faster processing ---
-    target_width = 480
+    target_width = tracker.target_width if tracker is not None else 480
     h, w, _ = frame.shape
     aspect_ratio = h / w
     target_height = int(target_width * aspect_ratio)
@@ -47,6 +283,7 @@ def analyze_frame(frame, pose_detector, face_detector):
     head_tilt = 0.0
     shoulder_diff = None
     hair_score = None
+    anchor = None
 
     # Pose detection
     results = pose_detector.process(rgb)
@@ -74,30 +311,46 @@ def analyze_frame(frame, pose_detector, face_detector):
         upright = nose_y < shoulders_mid
         
         posture_score = 8.0 if (shoulder_ok and upright) else 5.0 if shoulder_ok or upright else 3.0
+        anchor = FaceTracker.landmark_anchor(nose, left_eye, right_eye)
 
-    # Face detection for hair heuristic
-    face_res = face_detector.process(rgb)
-    if face_res.detections:
-        d = face_res.detections[0]
-        bbox = d.location_data.relative_bounding_box
-        
-        if bbox:
-            x, y, bw, bh = int(bbox.xmin * w), int(bbox.ymin * h), int(bbox.width * w), int(bbox.height * h)
-
-            top_y = max(0, y - int(0.6 * bh))
-            hair_region = resized_frame[top_y:y, x:x+bw]
-
-            if hair_region.size > 0:
-                gray_hair = cv2.cvtColor(hair_region, cv2.COLOR_BGR2GRAY)
-                edges = cv2.Canny(gray_hair, 50, 150)
-                edge_density = np.sum(edges) / hair_region.size
-                
-                hair_score = float(np.clip(10 - (edge_density * 0.5), 1, 10))
+    # Face box: tracked from the pose landmarks when possible, full detection otherwise
+    rel_box = None
+    if tracker is not None and not tracker.needs_detection(anchor):
+        rel_box = tracker.estimate(anchor)
+    else:
+        face_res = face_detector.process(rgb)
+        if face_res.detections:
+            bbox = face_res.detections[0].location_data.relative_bounding_box
+            if bbox:
+                rel_box = (bbox.xmin, bbox.ymin, bbox.width, bbox.height)
+        if tracker is not None:
+            if rel_box is not None and anchor is not None:
+                tracker.on_detection(rel_box, anchor)
             else:
-                hair_score = 5.0
+                tracker.forget()
+
+    # Hair heuristic from the region above the face box
+    if rel_box is not None:
+        x, y, bw, bh = int(rel_box[0] * w), int(rel_box[1] * h), int(rel_box[2] * w), int(rel_box[3] * h)
+        x, y = max(0, x), max(0, y)
+
+        top_y = max(0, y - int(0.6 * bh))
+        hair_region = resized_frame[top_y:y, x:x+bw]
+
+        if hair_region.size > 0:
+            gray_hair = cv2.cvtColor(hair_region, cv2.COLOR_BGR2GRAY)
+            edges = cv2.Canny(gray_hair, 50, 150)
+            edge_density = np.sum(edges) / hair_region.size
+            
+            hair_score = float(np.clip(10 - (edge_density * 0.5), 1, 10))
+        else:
+            hair_score = 5.0
     else:
         hair_score = None
 
+    if tracker is not None:
+        tracker.record((time.perf_counter() - t_start) * 1000)
+
     return {
         "posture_score": posture_score,
         "head_tilt_deg": round(float(head_tilt), 2),